@@ -14,6 +14,8 @@ from opensearchpy import OpenSearch
 import matrix_benchmarking.common as common
 import matrix_benchmarking.cli_args as cli_args
 import matrix_benchmarking.store as store
+import matrix_benchmarking.store.snapshot as store_snapshot
+import matrix_benchmarking.store.results_cache as results_cache
 import matrix_benchmarking.analyze.report as analyze_report
 
 LTS_ANCHOR_NAME = "source.lts.yaml"
@@ -26,6 +28,14 @@ def main(workload: str = "",
          report_dest: str = "regression_report.html",
          summary_yaml_dest: str = "regression_summary.yaml",
          kpi_filter: str = "",
+         parse_workers: int = 0,
+         parse_index: bool = False,
+         parse_profile: str = "",
+         lts_columnar: bool = False,
+         filter_pushdown: bool = False,
+         lazy_missing_settings: bool = False,
+         results_memory_budget: int = 0,
+         snapshot: bool = False,
          ):
     """
 Analyze MatrixBenchmark LTS results
@@ -39,6 +49,14 @@ Env:
     MATBENCH_LTS_RESULTS_DIRNAME
     MATBENCH_FILTERS
     MATBENCH_REPORT_DEST
+    MATBENCH_PARSE_WORKERS
+    MATBENCH_PARSE_INDEX
+    MATBENCH_PARSE_PROFILE
+    MATBENCH_LTS_COLUMNAR
+    MATBENCH_FILTER_PUSHDOWN
+    MATBENCH_LAZY_MISSING_SETTINGS
+    MATBENCH_RESULTS_MEMORY_BUDGET
+    MATBENCH_SNAPSHOT
 Args:
     workload: Name of the workload to execute. (Mandatory.)
     workload_base_directory: the directory from where the workload packages should be loaded. (Optional)
@@ -48,6 +66,14 @@ Args:
     report_dest: Where to save the regression analyses report
     kpi_filter: Filter (substring) that must be part of the KPI name to include it in the regression analyses
     summary_yaml_dest: Where to save the YAML summary of the regression analyses
+    parse_workers: If greater than 1, parse the results directories and load the LTS files in parallel with this number of worker processes. -1 for one worker per CPU. (Optional.)
+    parse_index: If 'True', keep an index of the parsed results next to the results directory, and reload the unchanged directories from it. (Optional.)
+    parse_profile: If set, profile the parsing of the results directories, log the slowest directories and the time spent in each parsing stage, and save the measurements into this JSON file. (Optional.)
+    lts_columnar: If 'True', load the LTS results of the directories that have an up-to-date columnar dataset (see download_lts --columnar) from this dataset instead of their JSON files. (Optional.)
+    filter_pushdown: If 'True' with 'filters', don't walk into the directories whose inherited settings are filtered out. Faster on large trees, but the results directories overriding a filtered setting in their own settings file are skipped. (Optional.)
+    lazy_missing_settings: If 'True', don't store the missing settings in the entries, resolve them to None when they are read through entry.settings.<key> or entry.get_settings(). (Optional.)
+    results_memory_budget: If greater than 0, store the parsed results in a temporary spill file, and load them on demand, keeping at most this amount of MB of results in memory. (Optional.)
+    snapshot: If 'True', save the parsed results next to the results directory, and reload them at the next start if the workload module and the results didn't change. (Optional.)
     """
 
     kwargs = dict(locals()) # capture the function arguments
@@ -62,10 +88,14 @@ Args:
 
         workload_store = store.load_workload_store(kwargs)
 
-        logging.info(f"Loading results ... ")
+        matrix_snapshot = store_snapshot.get_matrix_snapshot(workload_store)
+        snapshot_loaded = matrix_snapshot and matrix_snapshot.load()
 
-        workload_store.parse_data()
-        common.Matrix.uniformize_settings_keys()
+        if not snapshot_loaded:
+            logging.info(f"Loading results ... ")
+
+            workload_store.parse_data()
+            common.Matrix.uniformize_settings_keys(lazy=kwargs.get("lazy_missing_settings"))
         common.Matrix.print_settings_to_log()
 
         if not common.Matrix.processed_map:
@@ -77,7 +107,11 @@ Args:
         logging.info("")
         logging.info("--- LTS --- ")
 
-        workload_store.parse_lts_data()
+        if not snapshot_loaded:
+            workload_store.parse_lts_data()
+
+            if matrix_snapshot:
+                matrix_snapshot.save()
 
         common.LTS_Matrix.print_settings_to_log()
 
@@ -98,6 +132,9 @@ Args:
             )
 
             logging.info(f"The regression analyze finished with code {failures}.")
+
+            if cache := results_cache.get_results_cache():
+                cache.log_stats()
         except Exception as e:
             with open(store_dir / "FAILURE", 'a') as f:
                 print(str(e), file=f)
@@ -1,6 +1,7 @@
 from typing import Iterator
 import logging
-import os, types, itertools
+import os, sys, types, itertools, math
+import abc
 from collections import defaultdict
 import pathlib
 
@@ -8,7 +9,183 @@ import matrix_benchmarking
 
 MISSING_SETTING_VALUE = None
 
-class MatrixEntry(types.SimpleNamespace):
+class MatrixEntrySettings():
+    """
+    Settings of a MatrixEntry, accessed as attributes (entry.settings.<key>)
+    or as a dict (entry.settings.__dict__), like a SimpleNamespace.
+    The dict is shared with the key of the entry, instead of being copied.
+    """
+
+    # keys resolved to MISSING_SETTING_VALUE when they aren't in the dict (see lazy_settings_class)
+    missing_keys = ()
+
+    def __init__(self, settings=None):
+        if settings is not None:
+            self.__dict__ = settings
+
+    def __getattr__(self, name):
+        # only called when the attribute isn't in the dict
+        if name in type(self).missing_keys:
+            return MISSING_SETTING_VALUE
+
+        raise AttributeError(name)
+
+    def __reduce__(self):
+        # keep the dict shared with the entry key
+        return _restore_settings, (self.__dict__, type(self).missing_keys)
+
+    def __repr__(self):
+        return "namespace(" + ", ".join(f"{k}={v!r}" for k, v in self.__dict__.items()) + ")"
+
+    def __eq__(self, other):
+        if not isinstance(other, (MatrixEntrySettings, types.SimpleNamespace)):
+            return NotImplemented
+
+        return self.__dict__ == other.__dict__
+
+
+_lazy_settings_classes = {}
+
+def lazy_settings_class(missing_keys):
+    """
+    Returns the MatrixEntrySettings class resolving the 'missing_keys' to MISSING_SETTING_VALUE.
+    """
+    missing_keys = tuple(missing_keys)
+    if not missing_keys:
+        return MatrixEntrySettings
+
+    try:
+        return _lazy_settings_classes[missing_keys]
+    except KeyError: pass
+
+    clazz = type(MatrixEntrySettings.__name__, (MatrixEntrySettings, ),
+                 dict(missing_keys=dict.fromkeys(missing_keys), __module__=__name__,
+                      __qualname__=MatrixEntrySettings.__qualname__))
+    _lazy_settings_classes[missing_keys] = clazz
+
+    return clazz
+
+
+def _restore_settings(settings, missing_keys):
+    obj = MatrixEntrySettings(settings)
+    obj.__class__ = lazy_settings_class(missing_keys)
+
+    return obj
+
+
+def get_full_settings(settings):
+    """
+    Returns the dict of a settings namespace, including the missing keys
+    resolved lazily (see MatrixDefinition.uniformize_settings_keys).
+    """
+    missing_keys = getattr(type(settings), "missing_keys", ())
+    if not missing_keys:
+        return settings.__dict__
+
+    full_settings = dict(settings.__dict__)
+    for key in missing_keys:
+        if key not in full_settings:
+            full_settings[key] = MISSING_SETTING_VALUE
+
+    return full_settings
+
+
+class LazyResults(abc.ABC):
+    """
+    Placeholder of the results of an entry, loaded on demand (see store.results_cache).
+    """
+
+    __slots__ = ()
+
+    @abc.abstractmethod
+    def load(self):
+        pass
+
+
+class RunningStats():
+    """
+    Count, mean, M2, min and max of a stream of values, updated in O(1)
+    for each new value (Welford's algorithm).
+    """
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def variance(self):
+        # sample variance, as statistics.variance
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def __repr__(self):
+        return (f"RunningStats(count={self.count}, mean={self.mean}, stdev={self.stdev}, "
+                f"min={self.min}, max={self.max})")
+
+
+class EntryStats(dict):
+    """
+    Stats of an entry. The stats that aren't set explicitly are computed
+    on demand by the MatrixEntry.stats_provider (see plotting.table_stats.StatsEngine).
+    """
+
+    __slots__ = ("entry", )
+
+    def __init__(self, entry):
+        self.entry = entry
+
+    def __missing__(self, name):
+        provider = MatrixEntry.stats_provider
+        if provider is None:
+            raise KeyError(name)
+
+        return provider.get(name, self.entry)
+
+    def __contains__(self, name):
+        if dict.__contains__(self, name):
+            return True
+
+        provider = MatrixEntry.stats_provider
+
+        return provider is not None and provider.has_stat(name, self.entry)
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+
+class MatrixEntry():
+    # the __dict__ is only allocated if other attributes are set on the entry
+    __slots__ = ("is_gathered", "settings", "_stats",
+                 "location", "_results", "exit_code",
+                 "processed_key", "import_settings",
+                 "gathered_keys", "gathered_aggregates",
+                 "__dict__")
+
+    # computes the stats not set in the entries' stats (see EntryStats)
+    stats_provider = None
+
     def __init__(self, location, results, exit_code,
                  processed_key, import_key,
                  processed_settings, import_settings,
@@ -17,22 +194,26 @@ class MatrixEntry(types.SimpleNamespace):
                  stats=None, is_gathered=None):
         self.is_gathered = False
 
-        self.settings = settings or types.SimpleNamespace()
+        if settings is None:
+            self.settings = MatrixEntrySettings(processed_settings)
+        else:
+            self.settings = settings
+            self.settings.__dict__.update(processed_settings)
 
-        self.stats = {}
+        self._stats = None # created on demand
 
         self.location = location
         self.results = results
         self.exit_code = exit_code
 
-        self.settings.__dict__.update(processed_settings)
-
         self.processed_key = processed_key
         self.import_settings = processed_settings
 
         matrix.import_map[import_key] = \
         matrix.processed_map[processed_key] = self
 
+        matrix.index_record(self)
+
         keys_to_skip = set()
         for k, v in processed_settings.items():
             if not k.__hash__:
@@ -45,27 +226,164 @@ class MatrixEntry(types.SimpleNamespace):
 
         [matrix.settings[k].add(v) for k, v in processed_settings.items() if k not in keys_to_skip]
 
+    @property
+    def results(self):
+        results = self._results
+        if isinstance(results, LazyResults):
+            return results.load()
+
+        return results
+
+    @results.setter
+    def results(self, results):
+        self._results = results
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            self._stats = EntryStats(self)
+
+        return self._stats
+
+    @stats.setter
+    def stats(self, stats):
+        self._stats = stats
+
+    def toJSON(self):
+        # same content as when the entries were SimpleNamespaces (see parse.json_dumper)
+        content = dict(is_gathered=self.is_gathered, settings=self.settings, stats=self.stats,
+                       location=self.location, results=self.results, exit_code=self.exit_code,
+                       processed_key=self.processed_key, import_settings=self.import_settings)
+        if self.is_gathered:
+            content["gathered_keys"] = self.gathered_keys
+        content.update(self.__dict__)
+
+        return content
+
+    def add_gathered_entry(self, entry):
+        """
+        Appends 'entry' to the results of this gathered entry, and updates its aggregates.
+        """
+        self.results.append(entry)
+
+        for aggregate, value_fct in getattr(self, "gathered_aggregates", {}).values():
+            value = value_fct(entry)
+            if value is not None:
+                aggregate.add(value)
+
+    def gathered_aggregate(self, name, value_fct):
+        """
+        Returns the RunningStats of 'value_fct' over the entries of this
+        gathered entry ('None' values excepted). It is computed at the
+        first call, then updated as new entries are gathered.
+        """
+        try:
+            aggregates = self.gathered_aggregates
+        except AttributeError:
+            aggregates = self.gathered_aggregates = {}
+
+        try:
+            return aggregates[name][0]
+        except KeyError: pass
+
+        aggregate = RunningStats()
+        for entry in self.results:
+            value = value_fct(entry)
+            if value is not None:
+                aggregate.add(value)
+
+        aggregates[name] = aggregate, value_fct
+
+        return aggregate
+
+    def __repr__(self):
+        return f"MatrixEntry(location={self.location!r}, settings={self.settings!r})"
+
     def get_name(self, variables) -> str:
-        return ", ".join([f"{key}={self.settings.__dict__[key]}" for key in variables
-                          if self.settings.__dict__[key] is not MISSING_SETTING_VALUE
+        settings = self.get_settings()
+        return ", ".join([f"{key}={settings[key]}" for key in variables
+                          if settings[key] is not MISSING_SETTING_VALUE
                           and len([v for v in Matrix.settings[key] if v is not MISSING_SETTING_VALUE]) > 1])
 
     def get_settings(self) -> dict:
-        return self.settings.__dict__
+        # with the lazy uniformization, this is a copy of the settings
+        return get_full_settings(self.settings)
+
+
+_interned_canonical_keys = {}
+_MISSING_SETTING_VALUE_STR = f"{MISSING_SETTING_VALUE}"
+_interned_key_values = {}
 
 
 class MatrixKey(dict):
+    """
+    Key of the entries in the Matrix maps.
+
+    The key is the interned tuple of the sorted (name, str(value))
+    pairs of the settings ('stats' excepted), and its hash is computed
+    once. The settings must not be modified after the key creation,
+    except to add the missing values (see uniformize_settings_keys),
+    which aren't part of the key.
+    """
+
+    __slots__ = ("settings", "canonical", "_hash")
+
     def __init__(self, settings):
         self.settings = settings
 
+        canonical = []
+        for k in sorted(settings):
+            if k == "stats": continue
+
+            value = settings[k]
+            # the values are compared by their string, so that the settings coming
+            # from the UI (always str) match the parsed settings (int, float, ...)
+            value_str = sys.intern(f"{value}")
+            if type(value) is str and value is not value_str:
+                settings[k] = value_str # share the string with the other entries
+
+            key_value = (k, value_str)
+            canonical.append(_interned_key_values.setdefault(key_value, key_value))
+
+        canonical = tuple(canonical)
+
+        self.canonical = _interned_canonical_keys.setdefault(canonical, canonical)
+        self._hash = hash(self.canonical)
+
+    def __reduce__(self):
+        # the hash of the strings changes from one process to another, recompute it.
+        # The canonical tuple is kept, as the settings may have received missing values.
+        return _restore_matrix_key, (self.settings, self.canonical)
+
     def __str__(self):
-        return "|".join(f"{k}={self.settings[k]}" for k in sorted(self.settings) if k != "stats")
+        return "|".join(f"{k}={v}" for k, v in self.canonical)
 
     def __repr__(self):
         return str(self)
 
     def __hash__(self):
-        return hash(str(self))
+        return self._hash
+
+    def __eq__(self, other):
+        if not isinstance(other, MatrixKey):
+            return NotImplemented
+
+        return self.canonical is other.canonical or self.canonical == other.canonical
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+
+        return equal if equal is NotImplemented else not equal
+
+def _restore_matrix_key(settings, canonical):
+    key = MatrixKey.__new__(MatrixKey)
+    key.settings = settings
+
+    canonical = tuple(_interned_key_values.setdefault(key_value, key_value) for key_value in canonical)
+    key.canonical = _interned_canonical_keys.setdefault(canonical, canonical)
+    key._hash = hash(key.canonical)
+
+    return key
 
 LTS_META_KEYS = [
     "kpi_settings_version",
@@ -79,6 +397,46 @@ LTS_META_KEYS = [
     "lower_better",
 ]
 
+def _add_record_id(values_index, value, record_id):
+    # most of the values have a single record (eg, timestamps), don't allocate a list for them
+    record_ids = values_index.get(value)
+    if record_ids is None:
+        values_index[value] = record_id
+    elif type(record_ids) is int:
+        values_index[value] = [record_ids, record_id]
+    else:
+        record_ids.append(record_id)
+
+
+def _get_record_ids(values_index, value):
+    record_ids = values_index.get(value)
+    if record_ids is None:
+        return set()
+    if type(record_ids) is int:
+        return {record_ids}
+
+    return set(record_ids)
+
+
+def _count_record_ids(values_index, value):
+    record_ids = values_index.get(value)
+    if record_ids is None:
+        return 0
+    if type(record_ids) is int:
+        return 1
+
+    return len(record_ids)
+
+
+def _add_to_key_index(key_index, matrix_key, record_id):
+    for key, value_str in matrix_key.canonical:
+        values_index = key_index.get(key)
+        if values_index is None:
+            values_index = key_index[key] = {}
+
+        _add_record_id(values_index, value_str, record_id)
+
+
 class MatrixDefinition():
     def __init__(self, is_lts=False):
         self.settings = defaultdict(set)
@@ -86,15 +444,116 @@ class MatrixDefinition():
         self.processed_map = {}
         self.is_lts = is_lts
 
+        # inverted index of the entries settings: key -> value -> id(s) of the records.
+        # The ids are the positions in self.records, which follows the processed_map order.
+        # A single id is stored as an int, multiple ids as a list (see _add_record_id).
+        self.records = []
+        self.settings_index = {}
+        self.unindexed_settings = {} # key -> ids of the records with an unhashable value
+
+        # same as settings_index, but built lazily from the MatrixKey strings (key -> str(value) -> ids)
+        self.key_index = None
+
+        # keys resolved to MISSING_SETTING_VALUE, when uniformize_settings_keys(lazy=True) was used
+        self.missing_settings_keys = {}
+
     def settings_to_key(self, settings):
         return MatrixKey(settings)
 
-    def similar_records(self, _ref_settings, ignore_keys, gathered=False, rewrite_settings=lambda x:x, ignore_lts_meta_keys=True):
-        ref_settings = rewrite_settings(dict(_ref_settings.__dict__))
+    def index_record(self, entry):
+        record_id = len(self.records)
+        self.records.append(entry)
+
+        if self.key_index is not None:
+            # kept up to date, the parsing looks up the gathered entries while adding the records
+            _add_to_key_index(self.key_index, entry.processed_key, record_id)
+
+        settings_index = self.settings_index
+        for key, value in entry.settings.__dict__.items():
+            values_index = settings_index.get(key)
+            if values_index is None:
+                values_index = settings_index[key] = {}
+
+            try:
+                _add_record_id(values_index, value, record_id)
+            except TypeError: # unhashable value
+                self.unindexed_settings.setdefault(key, set()).add(record_id)
+
+    def reindex_records(self):
+        """
+        Rebuilds the settings index. Must be called if the entries settings are modified.
+        """
+        self.records = []
+        self.settings_index = {}
+        self.unindexed_settings = {}
+        self.key_index = None
+
+        for entry in self.processed_map.values():
+            self.index_record(entry)
+
+    def _get_missing_record_ids(self, key):
+        # ids of the records without 'key' in their settings
+        values_index = self.settings_index.get(key, {})
+        present_ids = set().union(*[_get_record_ids(values_index, value) for value in values_index])
+        present_ids |= self.unindexed_settings.get(key, set())
+
+        return set(range(len(self.records))) - present_ids
+
+    def _lookup_records(self, settings):
+        # returns the ids of the records which may match all the 'settings', or None if all of them may match
+        candidates = []
+        for key, value in settings.items():
+            try:
+                record_ids = _get_record_ids(self.settings_index.get(key, {}), value)
+            except TypeError: # unhashable value, cannot use the index for this key
+                continue
+
+            if value is MISSING_SETTING_VALUE and key in self.missing_settings_keys:
+                record_ids |= self._get_missing_record_ids(key)
+
+            if key in self.unindexed_settings:
+                record_ids = record_ids | self.unindexed_settings[key]
+
+            if not record_ids:
+                return set()
+
+            candidates.append(record_ids)
+
+        if not candidates:
+            return None
+
+        candidates.sort(key=len)
+
+        return candidates[0].intersection(*candidates[1:])
+
+    def _indexed_records(self, settings, gathered):
+        record_ids = self._lookup_records(settings)
+        if record_ids is None:
+            yield from self.all_records(gathered=gathered)
+            return
+
+        for record_id in sorted(record_ids):
+            e = self.records[record_id]
+            if (gathered and e.is_gathered) or (not gathered and not e.is_gathered):
+                yield e
+
+    def similar_records(self, _ref_settings, ignore_keys, gathered=False, rewrite_settings=None, ignore_lts_meta_keys=True):
+        if rewrite_settings is None:
+            # the ignored keys are dropped from the index lookup,
+            # the candidate records are then checked as below
+            ref_settings = dict(get_full_settings(_ref_settings))
+            lookup_settings = {k: v for k, v in ref_settings.items()
+                               if not (ignore_lts_meta_keys and k in LTS_META_KEYS) and k not in ignore_keys}
+
+            records = self._indexed_records(lookup_settings, gathered)
+            rewrite_settings = lambda x: x
+        else:
+            ref_settings = rewrite_settings(dict(get_full_settings(_ref_settings)))
+            records = self.all_records(gathered=gathered)
 
         i  = 0
-        for entry in self.all_records(gathered=gathered):
-            entry_settings = rewrite_settings(dict(entry.settings.__dict__))
+        for entry in records:
+            entry_settings = rewrite_settings(dict(get_full_settings(entry.settings)))
             skip = False
             i += 1
             for k, v in ref_settings.items():
@@ -113,10 +572,11 @@ class MatrixDefinition():
                 yield entry
 
     def filter_records(self, settings, gathered=False):
-        for entry in self.all_records(gathered=gathered):
+        for entry in self._indexed_records(settings, gathered):
+            entry_settings = get_full_settings(entry.settings)
             skip = False
             for k, v in settings.items():
-                if entry.settings.__dict__.get(k, ...) == v:
+                if entry_settings.get(k, ...) == v:
                     continue
 
                 skip = True
@@ -125,6 +585,85 @@ class MatrixDefinition():
             if not skip:
                 yield entry
 
+    def _get_key_index(self):
+        if self.key_index is not None:
+            return self.key_index
+
+        self.key_index = key_index = {}
+        for record_id, entry in enumerate(self.records):
+            _add_to_key_index(key_index, entry.processed_key, record_id)
+
+        return self.key_index
+
+    def _product_records(self, settings, setting_lists):
+        """
+        Returns the (positions, settings_values, entry) tuples of the
+        existing entries of the product of 'setting_lists', in the
+        itertools.product order. 'settings' provides the fixed settings.
+
+        The entries are looked up with the string of their key, as
+        processed_map[settings_to_key(...)] does.
+        """
+        key_index = self._get_key_index()
+
+        variable_keys = [setting_list[0][0] for setting_list in setting_lists]
+        all_keys = (set(settings) | set(variable_keys)) - {"stats"}
+
+        # the missing values aren't part of the keys (see MatrixKey):
+        # an entry without a key matches the MISSING_SETTING_VALUE of this key
+        expected_values = {} # key -> str(value)
+        candidates = [] # (values index, accepted str(values)) of each key
+        for key in all_keys - set(variable_keys):
+            value_str = expected_values[key] = f"{settings[key]}"
+            if value_str == _MISSING_SETTING_VALUE_STR:
+                continue # the entries without this key match as well
+
+            candidates.append((key_index.get(key, {}), [value_str]))
+
+        # str(value) -> positions in the setting list
+        values_positions = []
+        for key, setting_list in zip(variable_keys, setting_lists):
+            positions = defaultdict(list)
+            for position, (_key, value) in enumerate(setting_list):
+                positions[f"{value}"].append(position)
+            values_positions.append(positions)
+
+            if _MISSING_SETTING_VALUE_STR in positions:
+                continue # the entries without this key match as well
+
+            candidates.append((key_index.get(key, {}), list(positions)))
+
+        if candidates:
+            # only the records of the most selective key are read, the other keys are checked below
+            values_index, values_str = min(candidates, key=lambda candidate: sum(
+                _count_record_ids(candidate[0], value_str) for value_str in candidate[1]))
+            record_ids = set().union(*[_get_record_ids(values_index, value_str) for value_str in values_str])
+        else:
+            record_ids = range(len(self.records))
+
+        records = []
+        for record_id in record_ids:
+            entry = self.records[record_id]
+            entry_key_values = dict(entry.processed_key.canonical)
+            if not entry_key_values.keys() <= all_keys:
+                continue # the entry has more settings than the combinations
+
+            if any(entry_key_values.get(key, _MISSING_SETTING_VALUE_STR) != value_str
+                   for key, value_str in expected_values.items()):
+                continue
+
+            entry_positions = [positions.get(entry_key_values.get(key, _MISSING_SETTING_VALUE_STR), [])
+                               for key, positions in zip(variable_keys, values_positions)]
+
+            # duplicated values in the setting lists yield the entry multiple times, as the product does
+            for positions in itertools.product(*entry_positions):
+                settings_values = [setting_list[position] for setting_list, position in zip(setting_lists, positions)]
+                records.append((positions, settings_values, entry))
+
+        records.sort(key=lambda record: record[0])
+
+        return records
+
     def all_records(self, settings=None, setting_lists=None, gathered=False) -> Iterator[MatrixEntry]:
 
         if not setting_lists:
@@ -133,22 +672,34 @@ class MatrixDefinition():
                     yield e
             return
 
-        for settings_values in sorted(itertools.product(*setting_lists), key=lambda x:x[0][0] if x else None):
-            settings.update(dict(settings_values))
+        if not all(setting_lists):
+            return # empty product
 
-            key = self.settings_to_key(settings)
-            try:
-                e = self.processed_map[key]
-            except KeyError: # missing experiment, ignore
-                continue
+        # only walk the entries which exist, instead of all the combinations of the product
+        for _positions, settings_values, e in self._product_records(settings, setting_lists):
+            settings.update(dict(settings_values))
 
             if (gathered and e.is_gathered) or (not gathered and not e.is_gathered):
                 yield e
 
+        # leave 'settings' in the state of the end of the product walk
+        settings.update(dict(setting_list[-1] for setting_list in setting_lists))
+
     def get_record(self, settings):
         key = self.settings_to_key(settings)
 
-        return self.processed_map.get(key, None)
+        entry = self.processed_map.get(key, None)
+        if entry is not None:
+            return entry
+
+        # the missing values aren't part of the keys (see MatrixKey)
+        if not any(f"{value}" == _MISSING_SETTING_VALUE_STR for value in settings.values()):
+            return None
+
+        for _positions, _settings_values, entry in self._product_records(settings, []):
+            return entry
+
+        return None
 
     def count_records(self, settings=None, setting_lists=None):
         if settings is None and setting_lists is None:
@@ -188,19 +739,47 @@ class MatrixDefinition():
 
         return True
 
-    def uniformize_settings_keys(self):
-        orig_processed_map = dict(self.processed_map)
+    def uniformize_settings_keys(self, lazy=False):
+        """
+        Gives all the entries the same settings keys, the keys missing
+        from an entry are set to MISSING_SETTING_VALUE.
+
+        The missing values aren't part of the MatrixKey, so the keys
+        don't need to be recreated.
+
+        With 'lazy', the missing values aren't stored in the entries:
+        they are resolved when accessed with entry.settings.<key> or
+        entry.get_settings() (but not with entry.settings.__dict__).
+        """
+        settings_keys = list(self.settings.keys())
+
+        if lazy:
+            self.missing_settings_keys = dict.fromkeys(settings_keys)
+            settings_class = lazy_settings_class(settings_keys)
+
+        incomplete_keys = set()
+        for record_id, entry in enumerate(self.records):
+            entry_settings = entry.settings.__dict__
+            missing_keys = [key for key in settings_keys if key not in entry_settings]
+            if not missing_keys:
+                continue
+
+            incomplete_keys.update(missing_keys)
 
-        self.processed_map = {}
-        for entry_key, entry in orig_processed_map.items():
-            for settings_key in self.settings.keys():
-                if settings_key in entry_key.settings: continue
+            if lazy and isinstance(entry.settings, MatrixEntrySettings):
+                entry.settings.__class__ = settings_class
+                continue
+
+            key_settings = entry.processed_key.settings
+            for key in missing_keys:
+                entry_settings[key] = MISSING_SETTING_VALUE
+                if key_settings is not entry_settings:
+                    key_settings[key] = MISSING_SETTING_VALUE
 
-                entry_key.settings[settings_key] = MISSING_SETTING_VALUE
-                self.settings[settings_key].add(MISSING_SETTING_VALUE)
-                entry.settings.__dict__[settings_key] = MISSING_SETTING_VALUE
+                _add_record_id(self.settings_index.setdefault(key, {}), MISSING_SETTING_VALUE, record_id)
 
-            self.processed_map[entry_key] = entry
+        for key in incomplete_keys:
+            self.settings[key].add(MISSING_SETTING_VALUE)
 
 Matrix = MatrixDefinition()
 LTS_Matrix = MatrixDefinition(is_lts=True)
@@ -25,6 +25,7 @@ def main(opensearch_host: str = "",
          max_records: int = 10000,
          force: bool = None,
          clean: bool = None,
+         columnar: bool = None,
          ):
     """
 Download MatrixBenchmark result from OpenSearch
@@ -43,12 +44,13 @@ Args:
     max_records: Maximum number of records to retrieve from the OpenSearch instance. 10,000 is the largest number possible without paging (Optional.)
     force: Ignore the presence of the anchor file before downloading the results (Optional.)
     clean: Delete all the existing '.json' files in the lts-results-dirname before downloading the results (Optional.)
+    columnar: Also save the results into a single-file Parquet dataset, loaded instead of the JSON files with the lts_columnar flag. Requires pyarrow (Optional.)
     """
 
     kwargs = dict(locals()) # capture the function arguments
 
-    optionals_flags = ["filters", "max_records", "force", "clean"]
-    safe_flags = ["filters", "lts_results_dirname", "opensearch_index", "max_records", "force", "clean"]
+    optionals_flags = ["filters", "max_records", "force", "clean", "columnar"]
+    safe_flags = ["filters", "lts_results_dirname", "opensearch_index", "max_records", "force", "clean", "columnar"]
 
     cli_args.update_env_with_env_files()
     cli_args.update_kwargs_with_env(kwargs)
@@ -69,6 +71,7 @@ Args:
             kwargs.get("max_records"),
             kwargs.get("force"),
             kwargs.get("clean"),
+            kwargs.get("columnar"),
         )
 
     return cli_args.TaskRunner(run)
@@ -90,7 +93,7 @@ def connect_opensearch_client(kwargs):
 
     return client
 
-def download(client, opensearch_index, filters, lts_results_dirname, max_records, force, clean):
+def download(client, opensearch_index, filters, lts_results_dirname, max_records, force, clean, columnar=False):
     lts_dir_anchor = lts_results_dirname / LTS_ANCHOR_NAME
     if lts_dir_anchor.exists():
         if not force:
@@ -155,3 +158,7 @@ def download(client, opensearch_index, filters, lts_results_dirname, max_records
         saved += 1
 
     logging.info(f"Saved {saved} OpenSearch {opensearch_index} results.")
+
+    if columnar:
+        logging.info(f"Saving the columnar dataset of the LTS results ...")
+        store.store_simple.build_lts_columnar_dataset(lts_results_dirname)
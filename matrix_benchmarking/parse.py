@@ -44,6 +44,12 @@ def main(workload: str = "",
          output_matrix: str = "",
          pretty: bool = True,
          lts: bool = False,
+         parse_workers: int = 0,
+         parse_index: bool = False,
+         parse_profile: str = "",
+         lts_columnar: bool = False,
+         filter_pushdown: bool = False,
+         lazy_missing_settings: bool = False,
          ):
     """
 Run MatrixBenchmarking results parsing.
@@ -57,6 +63,12 @@ Env:
     MATBENCH_FILTERS
     MATBENCH_CLEAN
     MATBENCH_RUN
+    MATBENCH_PARSE_WORKERS
+    MATBENCH_PARSE_INDEX
+    MATBENCH_PARSE_PROFILE
+    MATBENCH_LTS_COLUMNAR
+    MATBENCH_FILTER_PUSHDOWN
+    MATBENCH_LAZY_MISSING_SETTINGS
 
 See the `FLAGS` section for the descriptions.
 
@@ -70,6 +82,12 @@ Args:
     output_lts: Output the parsed LTS results into a specified file, or to stdout if '-' is supplied
     output_matrix: Output the internal entry matrix into a specified file, or to stdout if '-' is supplied
     lts: If 'True', invoke the LTS parser only.
+    parse_workers: If greater than 1, parse the results directories and load the LTS files in parallel with this number of worker processes. -1 for one worker per CPU. (Optional.)
+    parse_index: If 'True', keep an index of the parsed results next to the results directory, and reload the unchanged directories from it. (Optional.)
+    parse_profile: If set, profile the parsing of the results directories, log the slowest directories and the time spent in each parsing stage, and save the measurements into this JSON file. (Optional.)
+    lts_columnar: If 'True', load the LTS results of the directories that have an up-to-date columnar dataset (see download_lts --columnar) from this dataset instead of their JSON files. (Optional.)
+    filter_pushdown: If 'True' with 'filters', don't walk into the directories whose inherited settings are filtered out. Faster on large trees, but the results directories overriding a filtered setting in their own settings file are skipped. (Optional.)
+    lazy_missing_settings: If 'True', don't store the missing settings in the entries, resolve them to None when they are read through entry.settings.<key> or entry.get_settings(). (Optional.)
 """
 
     kwargs = dict(locals()) # capture the function arguments
@@ -93,7 +111,7 @@ Args:
             workload_store.parse_data()
 
         logging.info(f"Loading results: done, found {len(common.Matrix.processed_map)} results")
-        common.Matrix.uniformize_settings_keys()
+        common.Matrix.uniformize_settings_keys(lazy=kwargs.get("lazy_missing_settings"))
 
         if kwargs["clean"]:
             if not kwargs["run"]:
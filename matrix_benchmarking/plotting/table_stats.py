@@ -3,7 +3,9 @@ import datetime
 import logging
 
 import statistics
+import numbers
 
+import numpy
 import plotly.graph_objs as go
 from dash import html
 from dash import dcc
@@ -13,21 +15,307 @@ from matrix_benchmarking.common import Matrix
 from matrix_benchmarking import plotting
 
 def register_all():
+    global stats_engine
+
     for stat in TableStats.all_stats:
         common.Matrix.settings["stats"].add(stat.name)
 
-        if not isinstance(stat, TableStats): continue
+    # the stats of the entries are computed on demand
+    stats_engine = StatsEngine(common.Matrix)
+    common.MatrixEntry.stats_provider = stats_engine
+
+
+class StatValue():
+    """
+    Value (and stdev) of a stat for an entry, computed at the first access.
+    """
+
+    __slots__ = ("stat", "entry", "computed", "_value", "_stdev")
+
+    def __init__(self, stat, entry):
+        self.stat = stat
+        self.entry = entry
+
+        self.computed = False
+        self._value = None
+        self._stdev = None
+
+    def set(self, v):
+        try: self._value, *self._stdev = v
+        except TypeError: # cannot unpack non-iterable ... object
+            self._value = v
+
+        self.computed = True
+
+    def _compute(self):
+        stat = self.stat
+        try:
+            v = stat.do_process(self.entry)
+        except Exception as e:
+            logging.error(f"Failed to process field '{stat.field}' with"
+                          f"{stat.do_process.__self__.__class__.__name__}.{stat.do_process.__name__}:")
+            logging.error(f"{e.__class__.__name__}:{e}")
+            raise e
+
+        self.set(v)
+
+    @property
+    def value(self):
+        if not self.computed:
+            self._compute()
+
+        return self._value
+
+    @property
+    def stdev(self):
+        if not self.computed:
+            self._compute()
+
+        return self._stdev
+
+    def __str__(self):
+        stat = self.stat
+        if self.value is None: return "N/A"
+
+        val = f"{self.value:{stat.fmt}}{stat.unit}"
+        if not self.stdev:
+            pass
+        elif len(self.stdev) == 1:
+            if self.stdev[0] is not None:
+                val += f" +/- {self.stdev[0]:{stat.fmt}}{stat.unit}"
+        elif len(self.stdev) == 2:
+            if self.stdev[0] is not None:
+                val += f" + {self.stdev[0]:{stat.fmt}}"
+            if self.stdev[1] is not None:
+                val += f" - {self.stdev[1]:{stat.fmt}}"
+            val += str(stat.unit)
+        return val
+
+
+_NOT_COMPUTED = object()
+
+class StatsEngine():
+    """
+    Provides the stats of the Matrix entries (see common.EntryStats).
+
+    The column of a stat is allocated the first time the stat is
+    requested, and the StatValue of each entry is created the first time
+    it is requested, then memoized in the column. The columns are indexed
+    by the position of the entries in matrix.records.
+    """
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+        self.columns = {} # stat name -> StatValue (or list of StatValues for the gathered entries) per record
+        self.record_ids = {} # id(entry) -> position in matrix.records
+
+        self.hits = 0
+        self.misses = 0
+
+    def _check_records(self):
+        if len(self.record_ids) != len(self.matrix.records):
+            # the matrix changed, the columns must follow the new positions
+            self.record_ids = {id(record): record_id for record_id, record in enumerate(self.matrix.records)}
+            self.columns = {}
+
+    def _get_record_id(self, entry):
+        self._check_records()
+
+        return self.record_ids[id(entry)]
+
+    def _get_column(self, name):
+        self._check_records()
+
+        try:
+            return self.columns[name]
+        except KeyError:
+            column = self.columns[name] = [_NOT_COMPUTED] * len(self.matrix.records)
+
+        return column
+
+    def _get_table_stat(self, name):
+        stat = TableStats.stats_by_name[name]
+        if not isinstance(stat, TableStats):
+            raise KeyError(name)
+
+        return stat
+
+    def has_stat(self, name, entry):
+        try:
+            self._get_table_stat(name)
+            self._get_record_id(entry)
+        except KeyError:
+            return False
 
-        for entry in common.Matrix.processed_map.values():
-            if not entry.is_gathered:
-                entry.stats[stat.name] = stat.process(entry)
+        return True
+
+    def get(self, name, entry):
+        stat = self._get_table_stat(name)
+        column = self._get_column(name)
+        record_id = self.record_ids[id(entry)]
+
+        value = column[record_id]
+        if value is not _NOT_COMPUTED:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        if entry.is_gathered:
+            # the gathered entries are also in the Matrix, share their memoized values
+            value = [self.get(name, gathered_entry) if id(gathered_entry) in self.record_ids
+                     else stat.process(gathered_entry)
+                     for gathered_entry in entry.results if gathered_entry.results]
+        else:
+            value = stat.process(entry)
+
+        column[record_id] = value
+
+        return value
+
+    def get_batch(self, name, entries):
+        """
+        Returns the stat values of all the 'entries'. The values not
+        computed yet are evaluated at once with TableStats.process_batch.
+        """
+        stat = self._get_table_stat(name)
+        column = self._get_column(name)
+
+        values = [None] * len(entries)
+        to_compute = [] # (position in 'entries', record id)
+        for idx, entry in enumerate(entries):
+            value = dict.get(entry.stats, name, _NOT_COMPUTED) # set explicitly
+            if value is not _NOT_COMPUTED:
+                values[idx] = value
                 continue
 
-            entry.stats[stat.name] = gathered_stats = []
-            for gathered_entry in entry.results:
-                if not gathered_entry.results: continue
+            record_id = self.record_ids[id(entry)]
+            value = column[record_id]
+            if value is not _NOT_COMPUTED:
+                self.hits += 1
+                values[idx] = value
+            elif entry.is_gathered or not stat.has_batch_process():
+                values[idx] = self.get(name, entry)
+            else:
+                to_compute.append((idx, record_id))
+
+        if not to_compute:
+            return values
+
+        self.misses += len(to_compute)
+        for (idx, record_id), v in zip(to_compute, stat.process_batch([entries[idx] for idx, _ in to_compute])):
+            value = values[idx] = column[record_id] = StatValue(stat, entries[idx])
+            value.set(v)
+
+        return values
+
+    def compute_all(self):
+        """
+        Computes the stats of all the (not gathered) entries, and returns
+        their (value, stdev) by stat name and record id, for set_values.
+        """
+        self._check_records()
+        entries = [entry for entry in self.matrix.records if not entry.is_gathered]
+
+        all_values = {}
+        for stat in TableStats.all_stats:
+            if not isinstance(stat, TableStats) or not stat.has_batch_process():
+                continue # the custom stats are computed by their plotting function
+
+            try:
+                stat_values = self.get_batch(stat.name, entries)
+            except Exception as e:
+                logging.warning(f"Stats engine: cannot compute '{stat.name}' ({e.__class__.__name__}: {e})")
+                continue
+
+            values = all_values[stat.name] = [None] * len(self.matrix.records)
+            for entry, value in zip(entries, stat_values):
+                if isinstance(value, StatValue): # not set explicitly
+                    values[self.record_ids[id(entry)]] = (value._value, value._stdev)
+
+        return all_values
+
+    def set_values(self, all_values):
+        """
+        Sets the stat values returned by compute_all, for the same Matrix records.
+        """
+        self._check_records()
+
+        for name, values in all_values.items():
+            stat = TableStats.stats_by_name.get(name)
+            if not isinstance(stat, TableStats) or len(values) != len(self.matrix.records):
+                continue
+
+            column = self._get_column(name)
+            for record_id, value in enumerate(values):
+                if value is None or column[record_id] is not _NOT_COMPUTED:
+                    continue
+
+                stat_value = column[record_id] = StatValue(stat, self.matrix.records[record_id])
+                stat_value._value, stat_value._stdev = value
+                stat_value.computed = True
+
+    def log_stats(self):
+        logging.info(f"Stats engine: {self.hits} hits, {self.misses} misses, "
+                     f"{len(self.columns)} stats computed")
+
+
+stats_engine = None
+
+def get_stat_values(stat, entries):
+    """
+    Returns the values of 'stat' for all the 'entries', evaluated in one batch.
+    """
+    if stats_engine is None:
+        return [entry.stats[stat.name] for entry in entries]
+
+    return stats_engine.get_batch(stat.name, entries)
+
+
+# above this number of points, the scatter plots are rendered with WebGL
+WEBGL_POINT_THRESHOLD = 5000
+
+# the series longer than this number of points (the width of the generated images) are decimated
+DECIMATE_WIDTH = 1200
+
+def is_continuous_axis(x):
+    """
+    Tells if the 'x' values are numeric, ie, if dropping some of them
+    only reduces the density of the plot. The categories are never decimated.
+    """
+    return all(isinstance(_x, numbers.Real) and not isinstance(_x, bool) for _x in x if _x is not None)
+
+
+def decimate_min_max(x, y, max_points, *series):
+    """
+    Reduces the (x, y) series to about 'max_points' points, keeping the
+    minimum and the maximum of each bucket of consecutive points, in
+    their order. The None separators of the series are kept.
 
-                gathered_stats.append(stat.process(gathered_entry))
+    The other 'series' (eg, the errors of y) are reduced with the same points.
+    """
+    if len(y) <= max_points:
+        return (x, y, *series)
+
+    values = numpy.array([numpy.nan if _x is None or _y is None else _y for _x, _y in zip(x, y)], dtype=float)
+
+    nb_buckets = max(1, max_points // 2)
+    bucket_size = -(-len(values) // nb_buckets)
+    buckets = numpy.full(nb_buckets * bucket_size, numpy.nan)
+    buckets[:len(values)] = values
+    buckets = buckets.reshape(nb_buckets, bucket_size)
+
+    missing = numpy.isnan(buckets)
+    has_values = ~missing.all(axis=1)
+    starts = numpy.arange(nb_buckets) * bucket_size
+
+    keep = set((starts + numpy.where(missing, numpy.inf, buckets).argmin(axis=1))[has_values].tolist())
+    keep.update((starts + numpy.where(missing, -numpy.inf, buckets).argmax(axis=1))[has_values].tolist())
+    keep.update(idx for idx, _x in enumerate(x) if _x is None)
+
+    keep = sorted(keep)
+
+    return tuple([serie[idx] for idx in keep] for serie in (x, y, *series))
 
 
 class TableStats():
@@ -95,63 +383,25 @@ class TableStats():
         return obj
 
     def process(self, entry):
-        class FutureValue():
-            def __init__(self):
-                self.computed = False
-                self._value = None
-                self._stdev = None
-
-            @property
-            def value(myself):
-                if myself._value is not None: return myself._value
-                try:
-                    v = self.do_process(entry)
-                except Exception as e:
-                    logging.error(f"Failed to process field '{self.field}' with"
-                                  f"{self.do_process.__self__.__class__.__name__}.{self.do_process.__name__}:")
-                    logging.error(f"{e.__class__.__name__}:{e}")
-                    raise e
-
-                try: myself._value, *myself._stdev = v
-                except TypeError: # cannot unpack non-iterable ... object
-                    myself._value = v
-
-                return myself._value
-
-            @property
-            def stdev(myself):
-                if myself._value is not None:
-                    _not_used = myself.value # force trigger the computation
-
-                return myself._stdev
-
-            def __str__(myself):
-                if myself.value is None: return "N/A"
-
-                val = f"{myself.value:{self.fmt}}{self.unit}"
-                if not myself.stdev:
-                    pass
-                elif len(myself.stdev) == 1:
-                    if myself.stdev[0] is not None:
-                        val += f" +/- {myself.stdev[0]:{self.fmt}}{self.unit}"
-                elif len(myself.stdev) == 2:
-                    if myself.stdev[0] is not None:
-                        val += f" + {myself.stdev[0]:{self.fmt}}"
-                    if myself.stdev[1] is not None:
-                        val += f" - {myself.stdev[1]:{self.fmt}}"
-                    val += str(self.unit)
-                return val
-
-        return FutureValue()
+        return StatValue(self, entry)
+
+    def gathered_aggregate(self, entry):
+        """
+        Returns the RunningStats of this stat over the entries gathered in 'entry'.
+        """
+        return entry.gathered_aggregate(self.name, self._gathered_value)
+
+    def _gathered_value(self, gathered_entry):
+        return self.process_value_dev(gathered_entry)[0]
 
     def process_gathered_value_dev(self, entry):
-        values = [self.process_value_dev(gathered_entry)[0]
-                  for gathered_entry in entry.results]
-        values = [v for v in values if v is not None]
+        aggregate = self.gathered_aggregate(entry)
+        if not aggregate.count:
+            return None, None
 
-        mean = statistics.mean(values) / self.divisor
+        mean = aggregate.mean / self.divisor
 
-        stdev = statistics.stdev(values) if len(values) > 2 else 0
+        stdev = aggregate.stdev if aggregate.count > 2 else 0
 
         return mean, (stdev / self.divisor)
 
@@ -176,9 +426,10 @@ class TableStats():
         return value, dev_value
 
     def process_mean_std(self, entry):
-        values = self.field(entry)
+        return self._mean_std(entry, self.field(entry))
 
-        if not isinstance(value, list):
+    def _mean_std(self, entry, values):
+        if not isinstance(values, list):
             logging.warning(f"{entry.location}.results.{self.field} is "
                             f"NOT a list of length ({values})")
             values = [values]
@@ -194,6 +445,67 @@ class TableStats():
 
         return mean, (stdev / self.divisor)
 
+    def _get_field_values(self, entries, field_name):
+        # the stat can provide a 'batch_<field_name>' kwarg evaluating the field for many entries at once
+        batch_field = self.kwargs.get(f"batch_{field_name}")
+        if batch_field:
+            return list(batch_field(entries))
+
+        field = self.field if field_name == "field" else self.kwargs.get(field_name)
+        if field is None:
+            return None
+
+        return [field(entry) for entry in entries]
+
+    def has_batch_process(self):
+        return self.do_process in (self.process_value_dev, self.process_mean_std)
+
+    def process_batch(self, entries):
+        """
+        Evaluates the stat for all the (not gathered) 'entries' at once.
+
+        Returns the list of the (value, stdev) pairs, as returned by do_process.
+        The fields are evaluated for the whole column (see the batch_<field> kwargs).
+        """
+        try:
+            if self.do_process == self.process_value_dev:
+                return self._batch_value_dev(entries)
+
+            if self.do_process == self.process_mean_std:
+                return self._batch_mean_std(entries)
+        except Exception:
+            pass # not numeric values, evaluate them one by one (and report the errors there)
+
+        return [self.do_process(entry) for entry in entries]
+
+    def _batch_value_dev(self, entries):
+        # no arithmetic here: the values keep their type, only the fields are evaluated in batch
+        values = self._get_field_values(entries, "field")
+        present = [idx for idx, value in enumerate(values) if value is not None]
+
+        for idx in present:
+            if isinstance(values[idx], list):
+                logging.warning(f"{entries[idx].location}.results.{self.field} is "
+                                f"a list of length {len(values[idx])}")
+                values[idx] = values[idx][0]
+
+        dev_values = self._get_field_values([entries[idx] for idx in present], "dev_field")
+        if dev_values is None:
+            dev_values = [0] * len(present)
+
+        results = [(None, None)] * len(entries)
+        for idx, dev_value in zip(present, dev_values):
+            results[idx] = (values[idx], dev_value)
+
+        return results
+
+    def _batch_mean_std(self, entries):
+        # only the fields are evaluated in batch: the statistics module rounds
+        # the results exactly, a vectorized computation would differ from process_mean_std
+        all_values = self._get_field_values(entries, "field")
+
+        return [self._mean_std(entry, values) for entry, values in zip(entries, all_values)]
+
     def do_hover(self, meta_value, variables, figure, data, click_info):
         ax = figure['data'][click_info.idx]['xaxis']
 
@@ -319,6 +631,10 @@ class TableStats():
         legends_visible = []
         subplots_used = set()
 
+        # the stat is evaluated for all the plotted entries at once, after the loop
+        plotted_entries = []
+        y_entries = defaultdict(list) # legend_key -> position in plotted_entries, or None
+
         for entry in common.Matrix.all_records(settings, setting_lists):
             if self.name not in entry.stats:
                 logging.info(f"Stat '{self.name}' not found for entry '{entry.location}'")
@@ -334,8 +650,7 @@ class TableStats():
 
                 if prev_first_setting != first_setting:
                     x[legend_key].append(None)
-                    y[legend_key].append(None)
-                    y_err[legend_key].append(None)
+                    y_entries[legend_key].append(None)
 
             legend_keys.add(legend_key)
             if not x_key: x_key = legend_key[0].split("=")[1]
@@ -343,12 +658,23 @@ class TableStats():
             legend_names.add(legend_name)
             x[legend_key].append(x_key)
 
-            if entry.is_gathered:
-                y[legend_key].append(entry.stats[self.name][0].value)
-                y_err[legend_key].append(entry.stats[self.name][0].stdev)
-            else:
-                y[legend_key].append(entry.stats[self.name].value)
-                y_err[legend_key].append(entry.stats[self.name].stdev)
+            y_entries[legend_key].append(len(plotted_entries))
+            plotted_entries.append(entry)
+
+        stat_values = get_stat_values(self, plotted_entries)
+        for legend_key, positions in y_entries.items():
+            for position in positions:
+                if position is None:
+                    y[legend_key].append(None)
+                    y_err[legend_key].append(None)
+                    continue
+
+                stat_value = stat_values[position]
+                if plotted_entries[position].is_gathered:
+                    stat_value = stat_value[0]
+
+                y[legend_key].append(stat_value.value)
+                y_err[legend_key].append(stat_value.stdev)
 
         # ---
         def prepare_histogram(legend_key, color):
@@ -431,6 +757,12 @@ class TableStats():
 
             return max([yval for yval in [y_max]+y_err_data if yval is not None])
 
+        # large-data path, disabled with stats.decimate=0 / stats.webgl=0
+        do_decimate = var_length > 2 and bool(cfg.get('stats.decimate', True))
+        decimate_points = max(2, int(cfg.get('stats.decimate_width', DECIMATE_WIDTH)) // len(subplots))
+        nb_decimated_points = 0
+        nb_points_before_decimation = 0
+
         y_max = 0
         legend_keys = sorted(list(legend_keys), key=plotting.natural_keys)
         legend_names = sorted(list(legend_names), key=plotting.natural_keys)
@@ -449,18 +781,6 @@ class TableStats():
             else:
                 prepare_scatter(legend_key, color)
 
-            if has_err and var_length < 5:
-                if var_length <= 2:
-                    err_data = plot_histogram_err(legend_key)
-                else:
-                    if var_length < 4:
-                        err_data = prepare_scatter_short_err(legend_key)
-                    else:
-                        err_data = prepare_scatter_long_err(legend_key)
-
-                    y_max = plot_scatter_err(legend_key, err_data, y_max)
-
-
             if var_length >= 5 and DO_LOCAL_SORT:
                 # sort x according to y's value order
                 x[legend_key] = [_x for _y, _x in sorted(zip(y[legend_key], x[legend_key]),
@@ -474,6 +794,24 @@ class TableStats():
             #   need to sort and don't move the None location
             #   need to sort yerr as well
 
+            if do_decimate and len(y[legend_key]) > decimate_points and is_continuous_axis(x[legend_key]):
+                # more points than pixels, keep the min/max of each group of points (and their errors)
+                nb_points_before_decimation += len(y[legend_key])
+                x[legend_key], y[legend_key], y_err[legend_key] = \
+                    decimate_min_max(x[legend_key], y[legend_key], decimate_points, y_err[legend_key])
+                nb_decimated_points += len(y[legend_key])
+
+            if has_err and var_length < 5:
+                if var_length <= 2:
+                    err_data = plot_histogram_err(legend_key)
+                else:
+                    if var_length < 4:
+                        err_data = prepare_scatter_short_err(legend_key)
+                    else:
+                        err_data = prepare_scatter_long_err(legend_key)
+
+                    y_max = plot_scatter_err(legend_key, err_data, y_max)
+
             showlegend = legend_name not in legends_visible
             if showlegend: legends_visible.append(legend_name)
             subplots_used.add(ax)
@@ -511,6 +849,19 @@ class TableStats():
 
         layout.legend.traceorder = 'normal'
 
+        if nb_points_before_decimation:
+            layout.title.text += f" (decimated, {nb_decimated_points}/{nb_points_before_decimation} points shown)"
+
+        nb_points = sum(len(trace['x']) for trace in data)
+        if var_length > 2 and nb_points > WEBGL_POINT_THRESHOLD and bool(cfg.get('stats.webgl', True)):
+            logging.info(f"Plotting {nb_points} points with WebGL")
+            for trace in data:
+                if not isinstance(trace, dict): continue # stdev areas
+
+                if trace.get('type') == 'line':
+                    trace['mode'] = 'lines'
+                trace['type'] = 'scattergl'
+
         # ---
 
         fig = go.Figure(data)
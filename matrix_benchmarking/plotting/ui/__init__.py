@@ -1,4 +1,5 @@
 import types, importlib
+import time
 import urllib.parse
 import datetime
 import sys
@@ -15,7 +16,11 @@ import flask
 logging.info("Loading dash ... done")
 
 from matrix_benchmarking.plotting.table_stats import TableStats
+import matrix_benchmarking.plotting.table_stats as table_stats
 from matrix_benchmarking.common import Matrix
+import matrix_benchmarking.store.results_cache as results_cache
+import matrix_benchmarking.plotting.ui.figure_cache as figure_cache
+import matrix_benchmarking.plotting.ui.jobs as jobs
 from matrix_benchmarking import plotting
 
 NB_GRAPHS = 3
@@ -33,6 +38,9 @@ def configure(kwargs, workload_store):
     if hasattr(plotting_module, "register"):
         plotting_module.register()
 
+    figure_cache.configure(kwargs, workload_store, plotting_module)
+    jobs.configure(kwargs)
+
 def get_permalink(args, full=False):
     settings = dict(zip(Matrix.settings.keys(), args[:len(Matrix.settings)]))
 
@@ -63,7 +71,12 @@ def sanitize_setting_key(key):
     return key.replace(".", "-").replace("{", "(").replace("}", ")")
 
 
-def build_layout(search, serializing=False):
+def _serialize_figure(figure_args):
+    # module-level function, so that it can be executed in the 'generate' worker processes
+    return TableStats.graph_figure(*figure_args)
+
+
+def build_layout(search, serializing=False, executor=None):
     defaults = urllib.parse.parse_qs(search.split("?", maxsplit=1)[-1]) if search else {}
 
     matrix_controls = [html.B("Settings:", id="lbl_settings"), html.Br()]
@@ -151,6 +164,9 @@ def build_layout(search, serializing=False):
     graph_children = []
     stats = defaults.get("stats", [])
     if serializing:
+        # the figures are computed in the 'executor' workers if any,
+        # and added to the layout in the order of the stats
+        pending_figures = []
         for idx, stats_name in enumerate(stats):
             logging.info(f"Generate {idx}) {stats_name}")
             try:
@@ -166,7 +182,7 @@ def build_layout(search, serializing=False):
             current_serial_settings = [e for e in serial_settings]
             current_serial_settings[serial_stats_position] = [stats_name]
 
-            figure_text = TableStats.graph_figure(*(
+            figure_args = (
                 current_serial_settings                  # [Input('list-settings-'+sanitize_setting_key(key), "value") for key in Matrix.settings]
                 + [0]                                  # Input("lbl_settings", "n_clicks")
                 + defaults.get("settings-order", [[]]) # Input('settings-order', 'data-order')
@@ -174,9 +190,19 @@ def build_layout(search, serializing=False):
                 + ['']                                 # Input('custom-config', 'value')
                 + ['']                                 # Input('custom-config-saved', 'data-label')
                 + [defaults.get("cfg", [''])]          # State('custom-config-saved', 'data-label')
-            ))
+            )
+
+            if executor is not None:
+                figure_text = executor.submit(_serialize_figure, figure_args)
+            else:
+                figure_text = _serialize_figure(figure_args)
+
+            pending_figures.append((graph_children[-2:], figure_text))
+
+        for (graph, text), figure_text in pending_figures:
+            if executor is not None:
+                figure_text = figure_text.result()
 
-            graph, text = graph_children[-2:]
             if text:
                 logging.info("==>" + str(text))
 
@@ -194,6 +220,12 @@ def build_layout(search, serializing=False):
                                          config=dict(showTips=False)),
                                html.P(id=graph_id+"-txt")]
 
+        if jobs.job_queue:
+            # the figures are computed in the background, the browser polls their job
+            for graph_id in GRAPH_IDS:
+                graph_children += [dcc.Store(id=graph_id+"-job"),
+                                   dcc.Interval(id=graph_id+"-poll", interval=jobs.POLL_INTERVAL_MS, disabled=True)]
+
     graph_children += [html.Div(id="text-box:clientside-output")]
 
     return html.Div([
@@ -229,6 +261,18 @@ def build_callbacks(app):
 
         return resp
 
+    @app.server.route('/matrix/results_cache')
+    def results_cache_stats():
+        cache = results_cache.get_results_cache()
+
+        return flask.jsonify(cache.get_stats() if cache else dict(enabled=False))
+
+    @app.server.route('/matrix/jobs')
+    def jobs_stats():
+        job_queue = jobs.job_queue
+
+        return flask.jsonify(job_queue.get_stats() if job_queue else dict(enabled=False))
+
     app.clientside_callback(
         ClientsideFunction(namespace="clientside", function_name="resize_graph"),
         Output("text-box:clientside-output", "children"),
@@ -377,18 +421,71 @@ def build_callbacks(app):
 
                 return graph_style, text_style
 
-            @app.callback([Output(graph_id, 'figure'),
-                           Output(graph_id+"-txt", 'children')],
-                          [Input(f"list-settings-{sanitize_setting_key(key)}", "value") for key in Matrix.settings]
-                          +[Input("lbl_settings", "n_clicks")]
-                          +[Input('settings-order', 'data-order')]
-                          +[Input('config-title', 'n_clicks'),
-                            Input('custom-config', 'value'),
-                            Input('custom-config-saved', 'data-label')],
-                          [State('custom-config-saved', 'data-label')]
-            )
-            def graph_figure_cb(*args):
-                return graph_figure(*args)
+            graph_inputs = [Input(f"list-settings-{sanitize_setting_key(key)}", "value") for key in Matrix.settings] \
+                + [Input("lbl_settings", "n_clicks")] \
+                + [Input('settings-order', 'data-order')] \
+                + [Input('config-title', 'n_clicks'),
+                   Input('custom-config', 'value'),
+                   Input('custom-config-saved', 'data-label')]
+
+            if jobs.job_queue is None or graph_id == "graph-for-dl":
+                @app.callback([Output(graph_id, 'figure'),
+                               Output(graph_id+"-txt", 'children')],
+                              graph_inputs,
+                              [State('custom-config-saved', 'data-label')]
+                )
+                def graph_figure_cb(*args):
+                    return graph_figure(*args)
+            else:
+                @app.callback(Output(graph_id+"-job", 'data'),
+                              graph_inputs,
+                              [State('custom-config-saved', 'data-label'),
+                               State(graph_id+"-job", 'data')]
+                )
+                def graph_job_cb(*args):
+                    *args, previous_job_id = args
+
+                    # the callback context isn't available in the job thread
+                    try: triggered_id = dash.callback_context.triggered[0]["prop_id"]
+                    except IndexError:
+                        return dash.no_update # nothing triggered the script (on multiapp load)
+
+                    return jobs.job_queue.submit(graph_id, compute_graph_figure, triggered_id, *args,
+                                                 cancel=previous_job_id)
+
+                @app.callback([Output(graph_id, 'figure'),
+                               Output(graph_id+"-txt", 'children'),
+                               Output(graph_id+"-poll", 'disabled')],
+                              [Input(graph_id+"-job", 'data'),
+                               Input(graph_id+"-poll", 'n_intervals')]
+                )
+                def graph_job_result_cb(job_id, n_intervals):
+                    if job_id is None:
+                        return dash.no_update, dash.no_update, True
+
+                    job = jobs.job_queue.get_job(job_id)
+                    if job is None: # superseded or dropped
+                        return dash.no_update, dash.no_update, True
+
+                    if not job.future.done():
+                        position = jobs.job_queue.get_position(job)
+                        if position:
+                            progress = f"Waiting for a worker (position {position} in the queue) ..."
+                        else:
+                            progress = f"Computing the figure ({time.time() - job.started:.1f}s) ..."
+
+                        return dash.no_update, html.I(progress), False
+
+                    try:
+                        plot, msg = jobs.job_queue.pop_result(job_id)
+                    except Exception as e:
+                        msg = f"FAILED: {e.__class__.__name__}: {e}"
+                        logging.error(msg)
+                        return None, msg, True
+
+                    jobs.job_queue.log_stats()
+
+                    return plot, msg, True
 
             def graph_figure(*_args):
 
@@ -397,6 +494,9 @@ def build_callbacks(app):
                     return dash.no_update, "" # nothing triggered the script (on multiapp load)
                 except dash.exceptions.MissingCallbackContextException: triggered_id = '<manually triggered>'
 
+                return compute_graph_figure(triggered_id, *_args)
+
+            def compute_graph_figure(triggered_id, *_args):
                 *args, cfg_n_clicks, config, config_saved, config_init = _args
 
                 if triggered_id == "custom-config.value":
@@ -460,24 +560,43 @@ def build_callbacks(app):
 
                 setting_lists = [[(key, v) for v in variables[key]] for key in ordered_vars]
 
-                try:
-                    plot_msg = table_stat.do_plot(ordered_vars, settings, setting_lists, variables, cfg)
-                except Exception as e:
-                    import bdb
-                    if isinstance(e, bdb.BdbQuit): raise e
-
-                    msg = f"FAILED: {e.__class__.__name__}: {e}"
-                    logging.error(msg)
-
-                    traceback.print_exc()
-                    return None, msg
-
-                if plot_msg is None:
-                    msg = f"FAILED: {table_stat.do_plot.__qualname__} returned None ..."
-                    logging.error(msg)
-                    return None, msg
-
-                plot, msg = plot_msg
+                # the figures generated manually (--generate, /matrix/dl) aren't cached
+                cache = figure_cache.figure_cache if triggered_id != '<manually triggered>' else None
+                cached_figure = None
+                if cache:
+                    cache_key = cache.get_key(table_stat.name, settings, var_order, cfg.d)
+                    cached_figure = cache.get(cache_key)
+
+                if cached_figure:
+                    plot, msg, cfg_requests = cached_figure
+                    cfg.requests.update(cfg_requests)
+                else:
+                    try:
+                        plot_msg = table_stat.do_plot(ordered_vars, settings, setting_lists, variables, cfg)
+                    except Exception as e:
+                        import bdb
+                        if isinstance(e, bdb.BdbQuit): raise e
+
+                        msg = f"FAILED: {e.__class__.__name__}: {e}"
+                        logging.error(msg)
+
+                        traceback.print_exc()
+                        return None, msg
+
+                    if plot_msg is None:
+                        msg = f"FAILED: {table_stat.do_plot.__qualname__} returned None ..."
+                        logging.error(msg)
+                        return None, msg
+
+                    plot, msg = plot_msg
+
+                    if cache:
+                        plot = cache.put(cache_key, plot, msg, cfg.requests)
+
+                if table_stats.stats_engine:
+                    table_stats.stats_engine.log_stats()
+                if cache:
+                    cache.log_stats()
 
                 if "help" not in cfg.d:
                     return plot, msg
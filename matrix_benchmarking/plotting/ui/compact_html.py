@@ -0,0 +1,231 @@
+import os
+import html
+import json
+import base64
+import hashlib
+import logging
+import pathlib
+import numbers
+
+import numpy
+import plotly
+import plotly.io
+
+import matrix_benchmarking.cli_args as cli_args
+
+PLOTLYJS_ASSET = f"plotly-{plotly.__version__}.min.js"
+
+# the arrays shorter than this are left in the JSON of the figure
+MIN_PACKED_LENGTH = 16
+
+# the floats are packed in 32 bits if the rounding error stays below this fraction
+# of the values range (less than a pixel on the generated figures)
+FLOAT32_MAX_RELATIVE_ERROR = 1e-4
+
+_NUMPY_DTYPES = dict(i1="<i1", u1="<u1", i2="<i2", u2="<u2", i4="<i4", u4="<u4", f4="<f4", f8="<f8")
+
+_LOADER_JS = """
+(function() {
+  var TYPES = {i1: Int8Array, u1: Uint8Array, i2: Int16Array, u2: Uint16Array,
+               i4: Int32Array, u4: Uint32Array, f4: Float32Array, f8: Float64Array};
+
+  function decode(array) {
+    if (array.bdata === undefined) return array;
+
+    var bin = atob(array.bdata), bytes = new Uint8Array(bin.length);
+    for (var i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+
+    return new TYPES[array.dtype](bytes.buffer);
+  }
+
+  function resolve(obj, arrays) {
+    if (obj === null || typeof obj !== "object") return obj;
+    if (Array.isArray(obj)) return obj.map(function(elt) { return resolve(elt, arrays); });
+    if (obj.$ref !== undefined) return arrays[obj.$ref];
+
+    var resolved = {};
+    for (var key in obj) resolved[key] = resolve(obj[key], arrays);
+    return resolved;
+  }
+
+  // the figures are rendered when they are scrolled into view
+  var observer = new IntersectionObserver(function(entries) {
+    entries.forEach(function(entry) {
+      if (!entry.isIntersecting) return;
+      observer.unobserve(entry.target);
+
+      var figure = JSON.parse(document.getElementById(entry.target.dataset.figure).textContent);
+      var arrays = figure.arrays.map(decode);
+      Plotly.newPlot(entry.target, resolve(figure.data, arrays), figure.layout, {responsive: true});
+    });
+  });
+
+  document.querySelectorAll(".matbench-figure").forEach(function(div) { observer.observe(div); });
+})();
+"""
+
+
+def is_enabled():
+    return bool(cli_args.kwargs.get("compact_reports")) if cli_args.kwargs else False
+
+
+def write_plotlyjs_asset(dirname="."):
+    """
+    Writes the plotly.js library shared by the compact figure files, if it isn't there yet.
+    """
+    dest = pathlib.Path(dirname) / PLOTLYJS_ASSET
+    if dest.exists():
+        return dest
+
+    src = pathlib.Path(plotly.__file__).parent / "package_data" / "plotly.min.js"
+
+    # the 'generate' workers may write it concurrently
+    tmp_dest = dest.with_name(dest.name + f".{os.getpid()}.tmp")
+    tmp_dest.write_bytes(src.read_bytes())
+    os.replace(tmp_dest, dest)
+
+    logging.info(f"Saved the shared plotly.js library into {dest}")
+
+    return dest
+
+
+def _to_array(value):
+    # returns the numeric Numpy array of 'value', or None if it can't be packed
+
+    if isinstance(value, dict):
+        # the typed arrays of Plotly >= 6
+        if set(value.keys()) != {"dtype", "bdata"} or value["dtype"] not in _NUMPY_DTYPES:
+            return None
+
+        return numpy.frombuffer(base64.b64decode(value["bdata"]), dtype=_NUMPY_DTYPES[value["dtype"]])
+
+    if len(value) < MIN_PACKED_LENGTH:
+        return None
+
+    if not all(isinstance(v, numbers.Real) and not isinstance(v, bool) for v in value):
+        return None
+
+    return numpy.array(value)
+
+
+def _pack_array(array):
+    # returns the type code and the little-endian content of the typed array
+    if array.dtype.kind in "iu" and array.size:
+        int32 = numpy.iinfo(numpy.int32)
+        if int32.min <= array.min() and array.max() <= int32.max:
+            return "i4", array.astype("<i4")
+
+    array = array.astype("<f8")
+    if not array.size or not numpy.isfinite(array).all():
+        return "f8", array
+
+    rounded = array.astype("<f4")
+    max_error = numpy.abs(rounded.astype("<f8") - array).max()
+    if max_error == 0 or max_error <= FLOAT32_MAX_RELATIVE_ERROR * (array.max() - array.min()):
+        return "f4", rounded
+
+    return "f8", array
+
+
+class _ArraysTable():
+    # the arrays of a figure, each stored once
+
+    def __init__(self):
+        self.arrays = []
+        self.index = {}
+
+    def add(self, array):
+        key = hashlib.sha256(json.dumps(array, sort_keys=True).encode()).hexdigest()
+        try:
+            ref = self.index[key]
+        except KeyError:
+            ref = self.index[key] = len(self.arrays)
+            self.arrays.append(array)
+
+        return {"$ref": ref}
+
+    def pack(self, value):
+        if isinstance(value, dict):
+            array = _to_array(value)
+            if array is None:
+                return {k: self.pack(v) for k, v in value.items()}
+        elif isinstance(value, list):
+            if len(value) < MIN_PACKED_LENGTH:
+                return [self.pack(v) for v in value]
+
+            array = _to_array(value)
+            if array is None:
+                # not numeric (eg, dates or labels), only deduplicated
+                return self.add(value)
+        else:
+            return value
+
+        dtype, array = _pack_array(array)
+
+        return self.add(dict(dtype=dtype, bdata=base64.b64encode(array.tobytes()).decode()))
+
+
+def encode_figure(figure):
+    """
+    Returns the compact JSON description of 'figure': its arrays are
+    stored once, and the numeric ones are stored as base64 typed arrays.
+    """
+    fig_dict = json.loads(plotly.io.to_json(figure, validate=False))
+
+    arrays = _ArraysTable()
+    data = [arrays.pack(trace) for trace in fig_dict.get("data", [])]
+
+    return dict(arrays=arrays.arrays, data=data, layout=fig_dict.get("layout", {}))
+
+
+def figure_to_html_div(figure, div_id):
+    """
+    Returns the HTML elements of a compact figure, rendered by the loader when scrolled into view.
+    """
+    figure_json = json.dumps(encode_figure(figure), separators=(",", ":")).replace("</", "<\\/")
+
+    return (f"<div class='matbench-figure' id='{div_id}' data-figure='{div_id}-data' style='width:100%;height:100%'></div>\n"
+            f"<script type='application/json' id='{div_id}-data'>{figure_json}</script>")
+
+
+def write_figure_html(figure, dest):
+    """
+    Writes 'figure' into the HTML file 'dest', with the plotly.js library
+    shared by all the figure files of the current directory.
+    """
+    dest = pathlib.Path(dest)
+    plotlyjs = write_plotlyjs_asset()
+    plotlyjs_src = os.path.relpath(plotlyjs, dest.parent)
+
+    title = ""
+    if hasattr(figure, "layout") and figure.layout.title.text:
+        title = html.escape(figure.layout.title.text)
+
+    content = [
+        "<!DOCTYPE html>",
+        "<html>",
+        "<head>",
+        "<meta charset='utf-8'>",
+        f"<title>{title}</title>",
+        f"<script src='{plotlyjs_src}'></script>",
+        "<style>html, body { height: 100%; margin: 0; }</style>",
+        "</head>",
+        "<body>",
+        figure_to_html_div(figure, "figure"),
+        f"<script>{_LOADER_JS}</script>",
+        "</body>",
+        "</html>",
+    ]
+
+    with open(dest, "w", encoding="utf-8") as out_f:
+        print("\n".join(content), file=out_f)
+
+
+def write_html(figure, dest):
+    """
+    Writes 'figure' into the HTML file 'dest', in the compact format if the compact reports are enabled.
+    """
+    if is_enabled():
+        write_figure_html(figure, dest)
+    else:
+        figure.write_html(dest)
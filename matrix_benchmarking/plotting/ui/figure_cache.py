@@ -0,0 +1,205 @@
+import os
+import json
+import pickle
+import hashlib
+import logging
+import pathlib
+import importlib
+import threading
+import collections
+
+import matrix_benchmarking.common as common
+import matrix_benchmarking.cli_args as cli_args
+import matrix_benchmarking.plotting.table_stats as table_stats
+import matrix_benchmarking.store.parse_index as parse_index
+import matrix_benchmarking.store.snapshot as store_snapshot
+
+# bump this version when the format of the cached figures changes
+FIGURE_CACHE_VERSION = 1
+
+
+class FigureCache():
+    """
+    Keeps the last 'size' figures generated by the plotting functions,
+    keyed by the stat name, the selected settings, the variables order
+    and the effective plot configuration.
+
+    The cached figures are dropped when the Matrix is reloaded. If
+    'cache_dir' is set, the figures are also saved there, and are
+    reused by the next runs as long as 'fingerprint' (the results, the
+    experiment filters and the settings of the Matrix, the workload
+    store and plotting modules, and the plotting code of
+    matrix_benchmarking) doesn't change.
+    """
+
+    def __init__(self, size, cache_dir=None, fingerprint=None):
+        self.size = size
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir else None
+        self.fingerprint = fingerprint
+
+        self.figures = collections.OrderedDict() # key -> (plot, msg, cfg requests), in the LRU order
+        self.matrix_state = None
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _check_matrix(self):
+        # the Matrix and the stats engine are replaced when the results are reloaded
+        matrix_state = id(common.Matrix.processed_map), len(common.Matrix.processed_map), id(table_stats.stats_engine)
+        if matrix_state != self.matrix_state:
+            self.figures.clear()
+            self.matrix_state = matrix_state
+
+    def get_key(self, stat_name, settings, variables_order, cfg):
+        key = dict(
+            version=FIGURE_CACHE_VERSION,
+            fingerprint=self.fingerprint,
+            stat=stat_name,
+            settings={k: v for k, v in settings.items() if k != "stats"},
+            variables_order=variables_order,
+            cfg=cfg,
+        )
+
+        return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _get_path(self, key):
+        return self.cache_dir / f"{key}.pickle"
+
+    def get(self, key):
+        """
+        Returns the (plot, msg, cfg requests) of the figure, or None if it isn't in the cache.
+        """
+        with self.lock:
+            self._check_matrix()
+            try:
+                figure = self.figures[key]
+            except KeyError: pass
+            else:
+                self.figures.move_to_end(key)
+                self.hits += 1
+
+                return figure
+
+        figure = self._load(key)
+
+        with self.lock:
+            if figure is None:
+                self.misses += 1
+                return None
+
+            self.disk_hits += 1
+            self._add(key, figure)
+
+        return figure
+
+    def put(self, key, plot, msg, cfg_requests):
+        if hasattr(plot, "to_plotly_json"):
+            # the figure is sent as JSON to the browser, no need to keep the Plotly objects
+            plot = plot.to_plotly_json()
+
+        figure = plot, msg, set(cfg_requests)
+
+        with self.lock:
+            self._check_matrix()
+            self._add(key, figure)
+
+        self._save(key, figure)
+
+        return plot
+
+    def _add(self, key, figure):
+        self.figures[key] = figure
+        self.figures.move_to_end(key)
+
+        while len(self.figures) > self.size:
+            self.figures.popitem(last=False)
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+
+        path = self._get_path(key)
+        try:
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Figure cache: cannot load {path}, ignoring it. ({e.__class__.__name__}: {e})")
+            return None
+
+    def _save(self, key, figure):
+        if not self.cache_dir:
+            return
+
+        path = self._get_path(key)
+        tmp_path = path.with_name(path.name + f".{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(figure, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logging.warning(f"Figure cache: cannot save {path} ({e.__class__.__name__}: {e})")
+            tmp_path.unlink(missing_ok=True)
+
+    def log_stats(self):
+        logging.info(f"Figure cache: {self.hits} hits, {self.disk_hits} disk hits, {self.misses} misses, "
+                     f"{len(self.figures)}/{self.size} figures in memory")
+
+
+figure_cache = None
+
+def _sources_fingerprint(module):
+    # fingerprint of the Python files of 'module', and of its sub-modules if it is a package
+    module_file = pathlib.Path(module.__file__)
+    filenames = sorted(module_file.parent.rglob("*.py")) if hasattr(module, "__path__") else [module_file]
+
+    fingerprint = []
+    for filename in filenames:
+        stat = filename.stat()
+        fingerprint.append((str(filename), stat.st_mtime_ns, stat.st_size))
+
+    return tuple(fingerprint)
+
+
+def _matrix_fingerprint():
+    # the figures depend on the experiment filters and on the settings values of the parsed Matrix
+    content = dict(
+        filters=cli_args.experiment_filters,
+        settings={key: sorted(map(str, values)) for key, values in common.Matrix.settings.items()},
+    )
+
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def configure(kwargs, workload_store, plotting_module):
+    global figure_cache
+
+    size = kwargs.get("figure_cache_size")
+    if not size:
+        figure_cache = None
+        return
+
+    try:
+        size = int(size)
+    except ValueError:
+        raise ValueError(f"--figure-cache-size must be an integer, got '{size}'")
+
+    cache_dir = kwargs.get("figure_cache_dir")
+    fingerprint = None
+    if cache_dir:
+        # the figures saved on disk are only valid for the same results, filters, workload modules and plotting code
+        fingerprint = (parse_index.workload_fingerprint(workload_store),
+                       _matrix_fingerprint(),
+                       _sources_fingerprint(plotting_module),
+                       _sources_fingerprint(importlib.import_module("matrix_benchmarking.plotting")),
+                       store_snapshot.tree_fingerprint(kwargs["results_dirname"], kwargs.get("lts_results_dirname")))
+
+    figure_cache = FigureCache(size, cache_dir, fingerprint)
+    logging.info(f"Figure cache: keeping the last {size} figures"
+                 + (f", saved into {cache_dir}" if cache_dir else ""))
@@ -0,0 +1,205 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import pathlib
+import threading
+
+import plotly
+import plotly.io
+import plotly.utils
+
+import matrix_benchmarking.cli_args as cli_args
+
+# bump this version when the rendering of the images changes
+IMAGE_EXPORT_VERSION = 1
+
+
+class _LegacyKaleidoRenderer():
+    # Kaleido 0.x: one Chromium subprocess, kept running and reused by all the exports of the process
+
+    def __init__(self):
+        from kaleido.scopes.plotly import PlotlyScope
+
+        # the plotly.js of the Plotly package, so that the figures are
+        # rendered with the version they have been generated for
+        plotlyjs = pathlib.Path(plotly.__file__).parent / "package_data" / "plotly.min.js"
+        self.scope = PlotlyScope(plotlyjs=str(plotlyjs) if plotlyjs.exists() else None)
+
+    def render(self, images):
+        for fig_dict, path, fmt, width, height in images:
+            start = time.time()
+            try:
+                data = self.scope.transform(fig_dict, format=fmt, width=width, height=height)
+                pathlib.Path(path).write_bytes(data)
+            except Exception as e:
+                yield e, time.time() - start
+            else:
+                yield None, time.time() - start
+
+
+class _KaleidoRenderer():
+    # Kaleido >= 1: Plotly renders all the images of a batch with the same browser
+
+    def render(self, images):
+        start = time.time()
+        try:
+            plotly.io.write_images([fig_dict for fig_dict, *_ in images],
+                                   [path for _, path, *_ in images],
+                                   format=[fmt for _, _, fmt, _, _ in images],
+                                   width=[width for *_, width, _ in images],
+                                   height=[height for *_, height in images],
+                                   validate=False)
+        except Exception as e:
+            if len(images) == 1:
+                yield e, time.time() - start
+                return
+
+            # render the images one by one to find the failing ones
+            for image in images:
+                yield from self.render([image])
+            return
+
+        # the images are rendered together, only the average time is known
+        duration = (time.time() - start) / len(images)
+        for _ in images:
+            yield None, duration
+
+
+class ImageExporter():
+    """
+    Exports batches of figures to image files, with a renderer kept
+    alive for all the batches of the process.
+
+    If 'cache_dir' is set, the images are also saved there, keyed by the
+    hash of the figure content, and copied from there instead of being
+    rendered again when the figure didn't change since the last run.
+
+    The export time of each figure and of each batch is recorded in
+    'batches'.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir else None
+        self.renderer = None
+
+        self.batches = [] # dict(duration, figures=[(path, duration or None if unchanged)])
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _get_renderer(self):
+        if self.renderer is None:
+            try:
+                self.renderer = _LegacyKaleidoRenderer()
+            except ImportError:
+                self.renderer = _KaleidoRenderer()
+
+        return self.renderer
+
+    def get_key(self, fig_dict, fmt, width, height):
+        content = json.dumps(fig_dict, sort_keys=True, cls=plotly.utils.PlotlyJSONEncoder)
+
+        return hashlib.sha256(
+            f"{IMAGE_EXPORT_VERSION}|{plotly.__version__}|{fmt}|{width}|{height}|{content}".encode()
+        ).hexdigest()
+
+    def _get_cache_path(self, key, fmt):
+        return self.cache_dir / f"{key}.{fmt}"
+
+    def _save_to_cache(self, path, cache_path):
+        tmp_path = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logging.warning(f"Image export: cannot save {cache_path} ({e.__class__.__name__}: {e})")
+            tmp_path.unlink(missing_ok=True)
+
+    def export(self, images):
+        """
+        Exports the (figure, path, width, height) 'images', with the
+        format of the path extension.
+
+        Returns the list of the exceptions raised by the export of each
+        image, None if it succeeded.
+        """
+        start = time.time()
+
+        errors = [None] * len(images)
+        figures = [None] * len(images)
+        to_render = [] # (index, cache_path, (fig_dict, path, fmt, width, height))
+
+        for idx, (figure, path, width, height) in enumerate(images):
+            fmt = pathlib.Path(path).suffix[1:]
+            fig_dict = figure.to_dict() if hasattr(figure, "to_dict") else figure
+
+            cache_path = None
+            if self.cache_dir:
+                cache_path = self._get_cache_path(self.get_key(fig_dict, fmt, width, height), fmt)
+                try:
+                    shutil.copyfile(cache_path, path)
+                except FileNotFoundError: pass
+                else:
+                    figures[idx] = (str(path), None)
+                    continue
+
+            to_render.append((idx, cache_path, (fig_dict, path, fmt, width, height)))
+
+        if to_render:
+            rendered = self._get_renderer().render([image for *_, image in to_render])
+
+            for (idx, cache_path, (_, path, *_)), (error, duration) in zip(to_render, rendered):
+                figures[idx] = (str(path), duration)
+                errors[idx] = error
+
+                if error is None and cache_path is not None:
+                    self._save_to_cache(path, cache_path)
+
+        batch = dict(duration=time.time() - start, figures=figures)
+        self.batches.append(batch)
+
+        nb_rendered = len(to_render)
+        msg = (f"Image export: batch of {len(images)} figures in {batch['duration']:.2f}s, "
+               f"{nb_rendered} rendered, {len(images) - nb_rendered} unchanged")
+        if nb_rendered:
+            slowest_path, slowest_duration = max((fig for fig in figures if fig[1] is not None), key=lambda fig: fig[1])
+            msg += f", slowest: {slowest_path} ({slowest_duration:.2f}s)"
+        logging.info(msg)
+
+        return errors
+
+    def log_stats(self, batches=None):
+        if batches is None:
+            batches = self.batches
+
+        figures = [fig for batch in batches for fig in batch["figures"]]
+        durations = [duration for path, duration in figures if duration is not None]
+        if not figures:
+            return
+
+        msg = (f"Image export: {len(figures)} figures in {len(batches)} batches, "
+               f"{len(durations)} rendered in {sum(durations):.2f}s, {len(figures) - len(durations)} unchanged")
+        if durations:
+            msg += f", {sum(durations) / len(durations):.2f}s/figure, max {max(durations):.2f}s"
+        logging.info(msg)
+
+
+image_exporter = None
+_image_exporter_pid = None
+_lock = threading.Lock()
+
+def get_image_exporter():
+    global image_exporter, _image_exporter_pid
+
+    with _lock:
+        # the renderer can't be shared with the forked processes, each worker gets its own exporter
+        if image_exporter is None or _image_exporter_pid != os.getpid():
+            cache_dir = cli_args.kwargs.get("image_cache_dir") if cli_args.kwargs else None
+
+            image_exporter = ImageExporter(cache_dir)
+            _image_exporter_pid = os.getpid()
+
+    return image_exporter
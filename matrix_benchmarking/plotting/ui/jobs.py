@@ -0,0 +1,182 @@
+import time
+import logging
+import itertools
+import threading
+import collections
+import concurrent.futures
+
+# how often the Web UI checks if the figure of its job is ready
+POLL_INTERVAL_MS = 500
+
+# the results not fetched after this delay (the page was closed) are dropped
+JOB_RESULT_TTL = 10 * 60
+
+# number of jobs kept for the latency measurements
+LATENCY_WINDOW = 1000
+
+
+class Job():
+    def __init__(self, job_id, name):
+        self.id = job_id
+        self.name = name
+
+        self.future = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+
+class JobQueue():
+    """
+    Runs the figure callbacks of the Web UI in a pool of 'workers'
+    threads, so that a slow plot doesn't block the Flask request threads.
+
+    The callback submits the job and returns immediately, then the
+    browser polls its state until the figure is ready. When a newer
+    selection arrives, the previous job of the graph is cancelled if it
+    didn't start yet, or its result is dropped.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers,
+                                                              thread_name_prefix="matbench-plot")
+        self.jobs = {} # job id -> Job, until its result is fetched or dropped
+        self.lock = threading.Lock()
+        self.job_ids = itertools.count()
+
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0 # before starting
+        self.dropped = 0 # superseded while running, or never fetched
+
+        self.wait_times = collections.deque(maxlen=LATENCY_WINDOW)
+        self.run_times = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def submit(self, name, fct, *args, cancel=None):
+        """
+        Submits the execution of 'fct(*args)', after cancelling the job 'cancel' if set.
+
+        Returns the ID of the new job.
+        """
+        if cancel is not None:
+            self.cancel(cancel)
+
+        with self.lock:
+            self._prune()
+
+            job = Job(f"job-{next(self.job_ids)}", name)
+            self.jobs[job.id] = job
+            self.submitted += 1
+
+        job.future = self.executor.submit(self._run, job, fct, args)
+
+        return job.id
+
+    def _run(self, job, fct, args):
+        job.started = time.time()
+        try:
+            return fct(*args)
+        finally:
+            job.finished = time.time()
+
+            with self.lock:
+                self.completed += 1
+                self.wait_times.append(job.started - job.submitted)
+                self.run_times.append(job.finished - job.started)
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.pop(job_id, None)
+            if job is None:
+                return
+
+            if job.future.cancel():
+                self.cancelled += 1
+            else:
+                self.dropped += 1
+
+        logging.info(f"Jobs: {job.name} superseded, {job.id} cancelled")
+
+    def _prune(self):
+        now = time.time()
+        for job in list(self.jobs.values()):
+            if job.finished is not None and now - job.finished > JOB_RESULT_TTL:
+                del self.jobs[job.id]
+                self.dropped += 1
+
+    def get_job(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def get_position(self, job):
+        # position of 'job' in the queue, 0 when it is running
+        with self.lock:
+            if job.started is not None:
+                return 0
+
+            return 1 + sum(1 for other in self.jobs.values()
+                           if other.started is None and other.submitted < job.submitted)
+
+    def pop_result(self, job_id):
+        """
+        Returns the result of the finished job 'job_id', and forgets it.
+        """
+        with self.lock:
+            job = self.jobs.pop(job_id)
+
+        return job.future.result()
+
+    def get_stats(self):
+        with self.lock:
+            queued = sum(1 for job in self.jobs.values() if job.started is None)
+            running = sum(1 for job in self.jobs.values() if job.started is not None and job.finished is None)
+            wait_times = sorted(self.wait_times)
+            run_times = sorted(self.run_times)
+
+            stats = dict(
+                workers=self.workers,
+                queue_depth=queued,
+                running=running,
+                submitted=self.submitted,
+                completed=self.completed,
+                cancelled=self.cancelled,
+                dropped=self.dropped,
+            )
+
+        for name, durations in (("wait", wait_times), ("run", run_times)):
+            for percentile in (50, 95):
+                stats[f"{name}_p{percentile}"] = durations[len(durations) * percentile // 100] if durations else None
+            stats[f"{name}_max"] = durations[-1] if durations else None
+
+        return stats
+
+    def log_stats(self):
+        stats = self.get_stats()
+
+        def fmt(duration):
+            return "n/a" if duration is None else f"{duration:.2f}s"
+
+        logging.info(f"Jobs: {stats['queue_depth']} queued, {stats['running']}/{self.workers} running, "
+                     f"{stats['completed']} completed, {stats['cancelled']} cancelled, {stats['dropped']} dropped. "
+                     f"Wait p50 {fmt(stats['wait_p50'])} p95 {fmt(stats['wait_p95'])}, "
+                     f"run p50 {fmt(stats['run_p50'])} p95 {fmt(stats['run_p95'])}")
+
+
+job_queue = None
+
+def configure(kwargs):
+    global job_queue
+
+    workers = kwargs.get("background_workers")
+    if not workers:
+        job_queue = None
+        return
+
+    try:
+        workers = int(workers)
+    except ValueError:
+        raise ValueError(f"--background-workers must be an integer, got '{workers}'")
+
+    job_queue = JobQueue(workers)
+    logging.info(f"Jobs: computing the figures in the background with {workers} workers")
@@ -4,6 +4,23 @@ import logging
 from dash import html
 from dash import dcc
 
+import matrix_benchmarking.plotting.ui.image_export as image_export
+import matrix_benchmarking.plotting.ui.compact_html as compact_html
+
+
+class _ReportImage():
+    # placeholder of a graph image in the report, until the images are exported
+    def __init__(self, figure, dest):
+        self.figure = figure
+        self.dest = dest
+        # the compact reports load the images when they are scrolled into view
+        loading = " loading='lazy'" if compact_html.is_enabled() else ""
+        self.html = f"<p><a href='{dest}.html' target='_blank' title='Click to access the full-size interactive version.'><img src='{dest}.png'{loading}/></a></p>"
+
+    def __str__(self):
+        return self.html
+
+
 class _Report():
     def __init__(self, id_name, index):
         self.id_name = id_name
@@ -12,6 +29,7 @@ class _Report():
         self.figure_index = 0
         self.tabs_css_added = False
         self.tabs_container_id = 0
+        self.images = []
 
     def _children_element_to_html(self, elt):
         props = " ".join([f"{k}='{getattr(elt, k)}'" for k in elt.available_properties if k not in ("children", "style") and hasattr(elt, k)])
@@ -61,23 +79,37 @@ class _Report():
 
         logging.info(f"Saving {dest} ...")
         dest_html = f"{dest}.html"
-        dest_png = f"{dest}.png"
 
-        from .web import IMAGE_WIDTH, IMAGE_HEIGHT
         try:
-            figure.write_html(dest_html)
-            figure.write_image(dest_png, width=IMAGE_WIDTH, height=IMAGE_HEIGHT)
+            compact_html.write_html(figure, dest_html)
         except Exception as e:
-            msg = f"Failed to save graph #{self.index} {self.id_name} '{figure.layout.title.text}':"
-            logging.exception(f"Failed to save graph #{self.index} {self.id_name}: {e}")
+            return [self._graph_error_to_html(figure, e)]
 
-            return [
-                f"<p>{msg}: {e}</p>"
-            ]
+        # the images of the report are exported together, at the end of the generation
+        image = _ReportImage(figure, dest)
+        self.images.append(image)
+
+        return [image]
+
+    def _graph_error_to_html(self, figure, e):
+        msg = f"Failed to save graph #{self.index} {self.id_name} '{figure.layout.title.text}':"
+        logging.error(f"Failed to save graph #{self.index} {self.id_name}: {e}")
+
+        return f"<p>{msg}: {e}</p>"
+
+    def _export_images(self):
+        from .web import IMAGE_WIDTH, IMAGE_HEIGHT
+
+        if not self.images:
+            return
+
+        errors = image_export.get_image_exporter().export([
+            (image.figure, f"{image.dest}.png", IMAGE_WIDTH, IMAGE_HEIGHT) for image in self.images
+        ])
 
-        return [
-            f"<p><a href='{dest}.html' target='_blank' title='Click to access the full-size interactive version.'><img src='{dest}.png'/></a></p>"
-         ]
+        for image, error in zip(self.images, errors):
+            if error is not None:
+                image.html = self._graph_error_to_html(image.figure, error)
 
     def _tabs_element_to_html(self, tabs):
         """Convert dcc.Tabs to HTML with proper tab navigation"""
@@ -279,7 +311,8 @@ function showTab(containerId, tabId, buttonElement) {
         html += self._element_to_html(content)
         html += html_doc_end
 
-        html_content = "\n".join(html)
+        self._export_images()
+        html_content = "\n".join(map(str, html))
 
         if self.index is not None:
             dest = f"report_{self.index:02d}_{self.id_name}.html"
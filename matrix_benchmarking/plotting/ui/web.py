@@ -1,5 +1,9 @@
 import traceback, sys, os
+import io
 import logging
+import contextlib
+import multiprocessing
+import concurrent.futures
 
 import dash
 from dash import html
@@ -16,6 +20,8 @@ import matrix_benchmarking.store as store
 import matrix_benchmarking.cli_args as cli_args
 import matrix_benchmarking.plotting.table_stats as table_stats
 import matrix_benchmarking.plotting.ui.report as report
+import matrix_benchmarking.plotting.ui.image_export as image_export
+import matrix_benchmarking.plotting.ui.compact_html as compact_html
 
 IMAGE_WIDTH = int(os.environ.get("MATBENCH_PLOTTING_IMAGE_WIDTH", 1200))
 IMAGE_HEIGHT = int(os.environ.get("MATBENCH_PLOTTING_IMAGE_HEIGHT", 650))
@@ -60,6 +66,62 @@ def construct_dispatcher():
             return [msg, index]
 
 
+def get_generate_workers():
+    generate_workers = cli_args.kwargs.get("generate_workers")
+    if not generate_workers:
+        return 1
+
+    try:
+        generate_workers = int(generate_workers)
+    except ValueError:
+        raise ValueError(f"--generate-workers must be an integer, got '{generate_workers}'")
+
+    if generate_workers < 0:
+        return os.cpu_count() or 1
+
+    return generate_workers
+
+
+def _save_graphs(graphs):
+    # returns the lines of the reports index of each graph, written by the main process in the graphs order,
+    # and the image export batches
+
+    exporter = image_export.get_image_exporter()
+    first_batch = len(exporter.batches)
+
+    report_indexes = []
+    images = []
+    for idx, graph, text, is_report in graphs:
+        if is_report:
+            report_index_f = io.StringIO()
+            report.generate(idx, graph.id, text, report_index_f)
+
+            report_indexes.append((idx, report_index_f.getvalue()))
+            continue
+
+        figure = graph.figure
+        if not figure:
+            continue
+
+        dest = f"{idx:02d}_{graph.id.replace(' ', '_').replace('/', '_')}"
+
+        logging.info(f"Saving {dest} ...")
+        compact_html.write_html(figure, f"fig_{dest}.html")
+        images.append((figure, f"fig_{dest}.png", IMAGE_WIDTH, IMAGE_HEIGHT))
+
+    if images:
+        errors = exporter.export(images)
+        for (figure, dest, *_), error in zip(images, errors):
+            if error is not None:
+                logging.error(f"Failed to save {dest}: {error.__class__.__name__}: {error}")
+
+        first_error = next((error for error in errors if error is not None), None)
+        if first_error is not None:
+            raise first_error
+
+    return report_indexes, exporter.batches[first_batch:]
+
+
 def run():
     ui.build_callbacks(main_app)
     display_page = construct_dispatcher()
@@ -69,36 +131,50 @@ def run():
     if generate:
         logging.info(f"Generating http://127.0.0.1:8050/matrix?{generate.replace(' ', '%20')} ...")
 
-        page = ui.build_layout(generate, serializing=True)
+        generate_workers = get_generate_workers()
+        if generate_workers > 1:
+            logging.info(f"Generating the figures with {generate_workers} workers ...")
+            # 'fork' so that the workers inherit the Matrix and the workload plotting modules
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers=generate_workers,
+                                                              mp_context=multiprocessing.get_context("fork"))
+        else:
+            executor = None
+
+        with executor or contextlib.nullcontext():
+            page = ui.build_layout(generate, serializing=True, executor=executor)
 
-        idx = -1
-        content = page.children[1].children
-        report_index_f = open("reports_index.html", "w")
-        print("<ul>", file=report_index_f)
+            idx = -1
+            content = page.children[1].children
+            graphs = []
 
-        for graph, text in zip(content[0::2], content[1::2]):
-            if not isinstance(graph, dcc.Graph):
-                continue
-            idx += 1
+            for graph, text in zip(content[0::2], content[1::2]):
+                if not isinstance(graph, dcc.Graph):
+                    continue
+                idx += 1
 
-            stats = table_stats.TableStats.stats_by_id[graph.id]
+                stats = table_stats.TableStats.stats_by_id[graph.id]
+                graphs.append((idx, graph, text, getattr(stats, "is_report", False)))
 
-            if getattr(stats, "is_report", False):
-                report.generate(idx, graph.id, text, report_index_f)
-                continue
+            if executor is not None:
+                # interleaved, so that the workers get the same share of the (usually ordered) stats
+                saved_graphs = [executor.submit(_save_graphs, graphs[worker_idx::generate_workers])
+                                for worker_idx in range(generate_workers)]
+                saved_graphs = [future.result() for future in saved_graphs]
+            else:
+                saved_graphs = [_save_graphs(graphs)]
 
-            figure = graph.figure
-            if not figure:
-                continue
+            report_indexes = dict(report_index for report_indexes, _ in saved_graphs
+                                  for report_index in report_indexes)
+            image_export.get_image_exporter().log_stats([batch for _, batches in saved_graphs
+                                                         for batch in batches])
 
-            dest = f"{idx:02d}_{graph.id.replace(' ', '_').replace('/', '_')}"
+            with open("reports_index.html", "w") as report_index_f:
+                print("<ul>", file=report_index_f)
 
-            logging.info(f"Saving {dest} ...")
-            figure.write_html(f"fig_{dest}.html")
-            figure.write_image(f"fig_{dest}.png", width=IMAGE_WIDTH, height=IMAGE_HEIGHT)
+                for idx in sorted(report_indexes):
+                    print(report_indexes[idx], end="", file=report_index_f)
 
-        print("</ul>", file=report_index_f)
-        report_index_f.close()
+                print("</ul>", file=report_index_f)
 
         sys.exit(0)
 
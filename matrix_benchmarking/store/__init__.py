@@ -5,11 +5,14 @@ from collections import defaultdict
 import sys, logging
 import pathlib
 import inspect
+import functools
 
 import matrix_benchmarking.common as common
 import matrix_benchmarking.cli_args as cli_args
 import matrix_benchmarking.models as models
 import matrix_benchmarking.store.simple as store_simple
+import matrix_benchmarking.store.parse_profile as parse_profile
+import matrix_benchmarking.store.results_cache as results_cache
 
 def load_workload_store(kwargs):
     workload = kwargs["workload"]
@@ -40,27 +43,60 @@ def load_workload_store(kwargs):
     return store_module
 
 
-def should_be_filtered_out(settings):
-    for key, _value in settings.items():
-        if key not in cli_args.experiment_filters:
-            # Keep it
-            continue
-        value = str(_value)
-        filter_value = cli_args.experiment_filters[key]
-        if isinstance(filter_value, list):
-            if value in filter_value:
+class FiltersMatcher():
+    """
+    Precompiled version of cli_args.experiment_filters.
+    """
+
+    def __init__(self, experiment_filters):
+        self.experiment_filters = copy.deepcopy(experiment_filters)
+
+        self.accepted_values = {}
+        for key, filter_value in experiment_filters.items():
+            self.accepted_values[key] = frozenset(filter_value if isinstance(filter_value, list) else [filter_value])
+
+    def is_outdated(self):
+        return self.experiment_filters != cli_args.experiment_filters
+
+    def should_be_filtered_out(self, settings):
+        for key, accepted_values in self.accepted_values.items():
+            try:
+                value = settings[key]
+            except KeyError:
+                continue # Keep it
+
+            if str(value) in accepted_values:
                 continue # Keep it
 
-        elif filter_value == value:
-            continue # Keep it
+            # Skip it
+            return True
+
+        return False
+
 
-        # Skip it
-        return True
+filters_matcher = None
 
-    return False
+def get_filters_matcher():
+    global filters_matcher
+    if filters_matcher is None or filters_matcher.is_outdated():
+        filters_matcher = FiltersMatcher(cli_args.experiment_filters)
+
+    return filters_matcher
+
+
+def should_be_filtered_out(settings):
+    if not cli_args.experiment_filters:
+        return False
+
+    return get_filters_matcher().should_be_filtered_out(settings)
 
 
 def add_to_matrix(import_settings, location, results, exit_code, duplicate_handler, matrix=common.Matrix):
+    with parse_profile.stage("add_to_matrix"):
+        return _add_to_matrix(import_settings, location, results, exit_code, duplicate_handler, matrix)
+
+
+def _add_to_matrix(import_settings, location, results, exit_code, duplicate_handler, matrix):
     if should_be_filtered_out(import_settings):
         return
 
@@ -109,6 +145,8 @@ def add_to_matrix(import_settings, location, results, exit_code, duplicate_handl
                                processed_settings, import_settings,
                                matrix=matrix)
 
+    results_cache.spill_entry(entry)
+
     gather_rolling_entries(entry, matrix=matrix)
 
     return entry
@@ -137,8 +175,9 @@ def gather_rolling_entries(entry, matrix=common.Matrix):
         )
         gathered_entry.is_gathered = True
         gathered_entry.gathered_keys = defaultdict(set)
+        gathered_entry.gathered_aggregates = {}
 
-    gathered_entry.results.append(entry)
+    gathered_entry.add_gathered_entry(entry)
     for gathered_key in gathered_keys:
         gathered_entry.gathered_keys[gathered_key].add(entry.settings.__dict__[gathered_key])
 
@@ -152,10 +191,17 @@ def _rewrite_settings(import_settings, results, is_lts):
         logging.warning("No rewrite_setting function registered.")
         return import_settings
 
-    if "results" not in inspect.signature(custom_rewrite_settings).parameters:
-        return custom_rewrite_settings(import_settings)
+    with parse_profile.stage("rewrite_settings"):
+        if not _takes_results(custom_rewrite_settings):
+            return custom_rewrite_settings(import_settings)
+
+        return custom_rewrite_settings(import_settings, results, is_lts)
+
 
-    return custom_rewrite_settings(import_settings, results, is_lts)
+@functools.lru_cache(maxsize=None)
+def _takes_results(rewrite_settings_fct):
+    # inspect.signature is too slow to be called for every entry
+    return "results" in inspect.signature(rewrite_settings_fct).parameters
 
 
 def register_custom_rewrite_settings(fn):
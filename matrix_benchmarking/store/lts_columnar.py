@@ -0,0 +1,173 @@
+import json
+import logging
+import pathlib
+
+# Single-file (Parquet) version of the LTS JSON files of a directory.
+# The values are stored as JSON strings, the dataset is always read in full.
+# The file name starts with a '.' so that it is ignored by the JSON loader.
+COLUMNAR_FILENAME = ".lts_columnar.parquet"
+
+LOCATION_COLUMN = "location"
+METADATA_COLUMN = "metadata"
+RESULTS_COLUMN = "results"
+OTHERS_COLUMN = "others"
+SETTINGS_PREFIX = "settings."
+KPI_PREFIX = "kpis."
+
+FILES_METADATA_KEY = b"matbench.lts_files"
+FORMAT_METADATA_KEY = b"matbench.lts_format"
+FORMAT_VERSION = b"1"
+
+try: import orjson
+except ImportError: orjson = None
+
+
+def _json_loads(content):
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass # eg, NaN values aren't supported by orjson, fallback to json
+
+    return json.loads(content)
+
+
+def is_available():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        return False
+
+    return True
+
+
+def _files_fingerprint(lts_dir, filenames):
+    fingerprint = []
+    for filename in filenames:
+        stat = (lts_dir / filename).stat()
+        fingerprint.append([filename, stat.st_mtime_ns, stat.st_size])
+
+    return json.dumps(fingerprint).encode()
+
+
+def write_dataset(lts_dir, filenames, load_document):
+    """
+    Writes the LTS documents of 'lts_dir' into a Parquet file, with one
+    column per setting and per KPI. The settings and the KPIs are JSON-encoded.
+    """
+    import pyarrow
+    import pyarrow.parquet
+
+    lts_dir = pathlib.Path(lts_dir)
+
+    rows = []
+    settings_columns = {}
+    kpi_columns = {}
+    for filename in filenames:
+        document = dict(load_document(lts_dir / filename))
+
+        metadata = dict(document.pop("metadata"))
+        settings = metadata.get("settings") or {}
+        metadata["settings"] = None # keep the position of the key
+
+        kpis = document.get("kpis")
+        if isinstance(kpis, dict):
+            document["kpis"] = {} # keep the position of the key, the KPIs are in their columns
+        else:
+            kpis = {}
+
+        row = {
+            LOCATION_COLUMN: filename,
+            METADATA_COLUMN: json.dumps(metadata),
+            RESULTS_COLUMN: json.dumps(document.pop("results")) if "results" in document else None,
+            OTHERS_COLUMN: json.dumps(document),
+        }
+
+        for key, value in settings.items():
+            column = settings_columns.setdefault(key, SETTINGS_PREFIX + key)
+            row[column] = json.dumps(value)
+
+        for kpi_name, kpi in kpis.items():
+            column = kpi_columns.setdefault(kpi_name, KPI_PREFIX + kpi_name)
+            row[column] = json.dumps(kpi)
+
+        rows.append(row)
+
+    column_names = [LOCATION_COLUMN, METADATA_COLUMN, RESULTS_COLUMN, OTHERS_COLUMN] \
+        + list(settings_columns.values()) + list(kpi_columns.values())
+
+    table = pyarrow.table({name: pyarrow.array([row.get(name) for row in rows], type=pyarrow.string())
+                           for name in column_names})
+    table = table.replace_schema_metadata({FILES_METADATA_KEY: _files_fingerprint(lts_dir, filenames),
+                                           FORMAT_METADATA_KEY: FORMAT_VERSION})
+
+    dest = lts_dir / COLUMNAR_FILENAME
+    tmp_dest = dest.with_name(dest.name + ".tmp")
+    pyarrow.parquet.write_table(table, tmp_dest)
+    tmp_dest.replace(dest)
+
+    logging.info(f"Saved {len(rows)} LTS documents into {dest}")
+
+    return dest
+
+
+def is_up_to_date(lts_dir, filenames):
+    """
+    Tells if the Parquet file of 'lts_dir' contains the current version of 'filenames'.
+    """
+    path = pathlib.Path(lts_dir) / COLUMNAR_FILENAME
+    if not path.exists():
+        return False
+
+    if not is_available():
+        logging.debug(f"{path} exists but pyarrow isn't available, ignoring it.")
+        return False
+
+    import pyarrow.parquet
+
+    try:
+        schema_metadata = pyarrow.parquet.read_schema(path, memory_map=True).metadata or {}
+    except Exception as e:
+        logging.warning(f"Cannot read {path}, ignoring it. ({e.__class__.__name__}: {e})")
+        return False
+
+    if schema_metadata.get(FORMAT_METADATA_KEY) != FORMAT_VERSION:
+        return False
+
+    return schema_metadata.get(FILES_METADATA_KEY) == _files_fingerprint(lts_dir, filenames)
+
+
+def read_dataset(lts_dir):
+    """
+    Reads the Parquet file of 'lts_dir' and yields the (filename, document) tuples.
+
+    The file is memory-mapped.
+    """
+    import pyarrow.parquet
+
+    path = pathlib.Path(lts_dir) / COLUMNAR_FILENAME
+
+    table = pyarrow.parquet.read_table(path, memory_map=True)
+    columns = table.column_names
+    data = {name: table.column(name).to_pylist() for name in columns}
+
+    settings_columns = [(name[len(SETTINGS_PREFIX):], data[name]) for name in columns if name.startswith(SETTINGS_PREFIX)]
+    kpi_columns = [(name[len(KPI_PREFIX):], data[name]) for name in columns if name.startswith(KPI_PREFIX)]
+
+    for idx, filename in enumerate(data[LOCATION_COLUMN]):
+        document = dict(metadata=_json_loads(data[METADATA_COLUMN][idx]))
+
+        document["metadata"]["settings"] = {key: _json_loads(values[idx]) for key, values in settings_columns
+                                            if values[idx] is not None}
+
+        if data[RESULTS_COLUMN][idx] is not None:
+            document["results"] = _json_loads(data[RESULTS_COLUMN][idx])
+
+        others = _json_loads(data[OTHERS_COLUMN][idx])
+        if isinstance(others.get("kpis"), dict): # only when the source document has KPIs
+            others["kpis"] = {kpi_name: _json_loads(values[idx]) for kpi_name, values in kpi_columns
+                              if values[idx] is not None}
+
+        document.update(others)
+
+        yield filename, document
@@ -0,0 +1,167 @@
+import os
+import logging
+import pathlib
+import pickle
+import inspect
+
+# bump this version when the format of the index (or of the parsed entries) changes
+PARSE_INDEX_VERSION = 1
+
+
+def get_index_path(results_dir):
+    results_dir = pathlib.Path(results_dir).absolute()
+
+    return results_dir.parent / f".{results_dir.name}.matbench_parse_index"
+
+
+def _files_fingerprint(dirname):
+    fingerprint = []
+    for this_dir, directories, files in os.walk(dirname, followlinks=True):
+        directories.sort()
+        for filename in sorted(files):
+            path = pathlib.Path(this_dir) / filename
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue # broken symlink
+
+            fingerprint.append((str(path.relative_to(dirname)), stat.st_mtime_ns, stat.st_size))
+
+    return fingerprint
+
+
+def directory_fingerprint(dirname):
+    """
+    Fingerprint of a results directory: mtimes and sizes of all its files
+    (settings*, exit_code and the files read by the workload parser),
+    and of the settings files of its parent directories.
+    """
+    parents_settings = []
+    for parent_dir in dirname.parents:
+        for filename in list(parent_dir.glob("settings")) + list(parent_dir.glob("settings.*")):
+            stat = filename.stat()
+            parents_settings.append((str(filename), stat.st_mtime_ns, stat.st_size))
+
+    return tuple(parents_settings), tuple(_files_fingerprint(dirname))
+
+
+def workload_fingerprint(parse_fct):
+    """
+    Fingerprint of the Python files of the workload package providing
+    'parse_fct', including its subpackages.
+    """
+    if parse_fct is None:
+        return None
+
+    try:
+        module_file = pathlib.Path(inspect.getsourcefile(parse_fct))
+    except TypeError:
+        return None # built-in function
+
+    package_dir = module_file.parent
+    if not (package_dir / "__init__.py").exists():
+        filenames = package_dir.glob("*.py") # not in a package
+    else:
+        # the top-most package, eg, the workload package of {workload}.store
+        while (package_dir.parent / "__init__.py").exists():
+            package_dir = package_dir.parent
+        filenames = package_dir.rglob("*.py")
+
+    fingerprint = []
+    for filename in sorted(filenames):
+        stat = filename.stat()
+        fingerprint.append((str(filename), stat.st_mtime_ns, stat.st_size))
+
+    return tuple(fingerprint)
+
+
+class ParseIndex():
+    def __init__(self, results_dir, workload_fingerprint):
+        self.results_dir = pathlib.Path(results_dir)
+        self.path = get_index_path(results_dir)
+        self.workload_fingerprint = workload_fingerprint
+
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_serializable = 0
+
+    def load(self):
+        if not self.path.exists():
+            logging.info(f"Parse index: {self.path} does not exist, all the directories will be parsed.")
+            return
+
+        try:
+            with open(self.path, "rb") as f:
+                index = pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Parse index: cannot load {self.path}, ignoring it. ({e.__class__.__name__}: {e})")
+            return
+
+        if index.get("version") != PARSE_INDEX_VERSION:
+            logging.info(f"Parse index: {self.path} has an outdated version, ignoring it.")
+            return
+
+        if index.get("workload_fingerprint") != self.workload_fingerprint:
+            logging.info(f"Parse index: the workload module changed since {self.path} was generated, ignoring it.")
+            return
+
+        self.entries = index["entries"]
+        logging.info(f"Parse index: loaded {len(self.entries)} directories from {self.path}")
+
+    def _key(self, dirname):
+        return str(pathlib.Path(dirname).relative_to(self.results_dir))
+
+    def lookup(self, dirname, fingerprint):
+        """
+        Returns the parsed entries of 'dirname' if its fingerprint didn't change, or None.
+        """
+        try:
+            indexed_fingerprint, serialized_entries = self.entries[self._key(dirname)]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        if indexed_fingerprint != fingerprint:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return pickle.loads(serialized_entries)
+
+    def record(self, dirname, fingerprint, parsed_entries):
+        try:
+            serialized_entries = pickle.dumps(parsed_entries, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            if not self.not_serializable:
+                logging.warning(f"Parse index: cannot serialize the results of {dirname} ({e.__class__.__name__}: {e}). "
+                                "The directories with such results will be parsed at every run.")
+            self.not_serializable += 1
+            return
+
+        self.entries[self._key(dirname)] = fingerprint, serialized_entries
+
+    def save(self):
+        # forget the directories that have been removed
+        for key in list(self.entries.keys()):
+            if not (self.results_dir / key).exists():
+                del self.entries[key]
+
+        index = dict(
+            version=PARSE_INDEX_VERSION,
+            workload_fingerprint=self.workload_fingerprint,
+            entries=self.entries,
+        )
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Parse index: cannot save {self.path} ({e.__class__.__name__}: {e})")
+            return
+
+        logging.info(f"Parse index: {self.hits} directories loaded from the index, "
+                     f"{self.misses} parsed. Saved into {self.path}")
@@ -0,0 +1,172 @@
+import contextlib
+import json
+import logging
+import pathlib
+import time
+import tracemalloc
+
+import matrix_benchmarking.cli_args as cli_args
+
+# number of directories listed in the summary
+TOP_DIRECTORIES = 20
+
+_no_profiling = contextlib.nullcontext()
+
+
+def _get_bytes_read():
+    # Linux only: bytes read by the process, including the page cache hits
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.partition(":")[-1])
+    except OSError:
+        pass
+
+    return None
+
+
+class ParseProfiler():
+    """
+    Records the wall time, bytes read and peak memory of each results
+    directory, and the time spent in each stage of the parsing.
+
+    The stages can be nested (eg, add_to_matrix is called from the
+    workload parser). Each stage is accounted its own time only, without
+    the time of the nested stages.
+    """
+
+    def __init__(self, dest):
+        self.dest = pathlib.Path(dest)
+
+        self.directories = []
+        self.stage_totals = {}
+        self.start = None
+
+        self.current = None
+        self.stages_stack = []
+
+    def begin(self):
+        self.start = time.perf_counter()
+        tracemalloc.start()
+
+    @contextlib.contextmanager
+    def directory(self, dirname):
+        bytes_read = _get_bytes_read()
+        memory_start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        self.current = record = dict(directory=str(dirname), stages={})
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["wall_time"] = time.perf_counter() - start
+            record["other"] = record["wall_time"] - sum(record["stages"].values())
+            _, memory_peak = tracemalloc.get_traced_memory()
+            record["peak_memory"] = memory_peak - memory_start
+            record["bytes_read"] = None if bytes_read is None else _get_bytes_read() - bytes_read
+
+            self.directories.append(record)
+            self.current = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        # [stage name, start time, time spent in the nested stages]
+        stage = [name, time.perf_counter(), 0]
+        self.stages_stack.append(stage)
+        try:
+            yield
+        finally:
+            self.stages_stack.pop()
+            duration = time.perf_counter() - stage[1]
+            own_duration = duration - stage[2]
+
+            if self.stages_stack:
+                self.stages_stack[-1][2] += duration
+
+            self.stage_totals[name] = self.stage_totals.get(name, 0) + own_duration
+            if self.current is not None:
+                self.current["stages"][name] = self.current["stages"].get(name, 0) + own_duration
+
+    def end(self):
+        wall_time = time.perf_counter() - self.start
+        tracemalloc.stop()
+
+        self.log_summary(wall_time)
+        self.save(wall_time)
+
+    def log_summary(self, wall_time):
+        directories_time = sum(record["wall_time"] for record in self.directories)
+
+        logging.info(f"Parse profile: {len(self.directories)} directories parsed in {directories_time:.2f}s "
+                     f"(total parse time: {wall_time:.2f}s)")
+
+        logging.info("Parse profile: time per stage")
+        for name, duration in sorted(self.stage_totals.items(), key=lambda item: item[1], reverse=True):
+            logging.info(f"  {duration:8.3f}s  {name}")
+
+        logging.info(f"Parse profile: top {TOP_DIRECTORIES} slowest directories")
+        slowest = sorted(self.directories, key=lambda record: record["wall_time"], reverse=True)
+        for record in slowest[:TOP_DIRECTORIES]:
+            bytes_read = "n/a" if record["bytes_read"] is None else f"{record['bytes_read'] / 1024:.0f}kB"
+            main_stage = max(record["stages"].items(), key=lambda item: item[1], default=("other", 0))[0]
+
+            logging.info(f"  {record['wall_time']:8.3f}s  read={bytes_read:>8}  "
+                         f"peak_mem={record['peak_memory'] / 1024:.0f}kB  "
+                         f"main_stage={main_stage}  {record['directory']}")
+
+    def save(self, wall_time):
+        profile = dict(
+            wall_time=wall_time,
+            stages=self.stage_totals,
+            directories=self.directories,
+        )
+
+        with open(self.dest, "w") as f:
+            json.dump(profile, f, indent=4)
+
+        logging.info(f"Parse profile: saved into {self.dest}")
+
+
+profiler = None
+
+def start_profiling():
+    global profiler
+
+    dest = cli_args.kwargs.get("parse_profile") if cli_args.kwargs else None
+    if not dest:
+        profiler = None
+        return None
+
+    if dest is True:
+        raise ValueError("--parse-profile must provide the path of the JSON file to generate.")
+
+    profiler = ParseProfiler(dest)
+    profiler.begin()
+
+    return profiler
+
+
+def stop_profiling():
+    global profiler
+
+    if profiler is None:
+        return
+
+    profiler.end()
+    profiler = None
+
+
+def directory(dirname):
+    if profiler is None:
+        return _no_profiling
+
+    return profiler.directory(dirname)
+
+
+def stage(name):
+    if profiler is None:
+        return _no_profiling
+
+    return profiler.stage(name)
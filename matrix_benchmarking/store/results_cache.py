@@ -0,0 +1,218 @@
+import os
+import gc
+import sys
+import types
+import logging
+import pickle
+import tempfile
+import threading
+import collections
+
+import matrix_benchmarking.common as common
+import matrix_benchmarking.cli_args as cli_args
+
+
+# objects shared by all the results, not accounted in their size
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+
+
+def _memory_size(obj):
+    # size of 'obj' and of all the objects it references
+    seen = set()
+    size = 0
+    pending = [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+        seen.add(id(obj))
+
+        size += sys.getsizeof(obj)
+        pending += gc.get_referents(obj)
+
+    return size
+
+
+class SpilledResults(common.LazyResults):
+    """
+    Handle of results stored in the spill file of a ResultsCache.
+    """
+
+    __slots__ = ("cache", "offset", "size", "memory_size")
+
+    def __init__(self, cache, offset, size):
+        self.cache = cache
+        self.offset = offset
+        self.size = size # in the spill file
+        self.memory_size = None # measured at the first loading
+
+    def load(self):
+        return self.cache.load(self)
+
+    def __reduce__(self):
+        # the spill file doesn't outlive the process, serialize the results themselves
+        return pickle.loads, (self.cache.read(self), )
+
+
+class ResultsCache():
+    """
+    Stores the results of the Matrix entries in a spill file, and keeps
+    the most recently used ones in memory, within 'budget' bytes.
+
+    The memory size of the results is measured when they are loaded for
+    the first time.
+
+    The results modified after their loading are reset when they are
+    evicted from the memory.
+    """
+
+    def __init__(self, budget):
+        self.budget = budget
+
+        self.spill_file = tempfile.TemporaryFile(prefix="matbench_results_")
+        self.spill_size = 0
+
+        self.loaded = collections.OrderedDict() # SpilledResults -> results, in the LRU order
+        self.memory = 0
+        self.lock = threading.Lock()
+
+        self.spilled = 0
+        self.not_spilled = 0 # the results that cannot be pickled, kept in memory
+        self.hits = 0
+        self.loads = 0
+        self.reloads = 0
+        self.evictions = 0
+
+    def spill(self, results):
+        data = pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self.lock:
+            handle = SpilledResults(self, self.spill_size, len(data))
+            os.pwrite(self.spill_file.fileno(), data, self.spill_size)
+
+            self.spill_size += len(data)
+            self.spilled += 1
+
+        return handle
+
+    def read(self, handle):
+        return os.pread(self.spill_file.fileno(), handle.size, handle.offset)
+
+    def load(self, handle):
+        with self.lock:
+            try:
+                results = self.loaded[handle]
+            except KeyError: pass
+            else:
+                self.loaded.move_to_end(handle)
+                self.hits += 1
+
+                return results
+
+        results = pickle.loads(self.read(handle))
+
+        if handle.memory_size is None:
+            memory_size = _memory_size(results)
+        else:
+            memory_size = handle.memory_size
+
+        with self.lock:
+            if handle in self.loaded: # loaded concurrently by another thread
+                return self.loaded[handle]
+
+            if handle.memory_size is None:
+                self.loads += 1
+                handle.memory_size = memory_size
+            else:
+                self.reloads += 1
+
+            self.loaded[handle] = results
+            self.memory += memory_size
+
+            # always keep the results being loaded, even if they are larger than the budget
+            while self.memory > self.budget and len(self.loaded) > 1:
+                evicted_handle, _ = self.loaded.popitem(last=False)
+                self.memory -= evicted_handle.memory_size
+                self.evictions += 1
+
+        return results
+
+    def get_stats(self):
+        return dict(
+            budget=self.budget,
+            memory=self.memory,
+            loaded=len(self.loaded),
+            spilled=self.spilled,
+            not_spilled=self.not_spilled,
+            spill_size=self.spill_size,
+            hits=self.hits,
+            loads=self.loads,
+            reloads=self.reloads,
+            evictions=self.evictions,
+        )
+
+    def log_stats(self):
+        logging.info(f"Results cache: {self.spilled} results spilled ({self.spill_size / 1024 / 1024:.1f} MB), "
+                     f"{self.not_spilled} kept in memory, "
+                     f"{len(self.loaded)} loaded ({self.memory / 1024 / 1024:.1f} MB "
+                     f"out of {self.budget / 1024 / 1024:.0f} MB). "
+                     f"{self.hits} hits, {self.loads} loads, {self.reloads} reloads, {self.evictions} evictions")
+
+
+results_cache = None
+
+def get_results_cache():
+    global results_cache
+
+    budget = cli_args.kwargs.get("results_memory_budget") if cli_args.kwargs else None
+    if not budget:
+        return None
+
+    if results_cache is None:
+        try:
+            budget = float(budget)
+        except (TypeError, ValueError):
+            raise ValueError(f"--results-memory-budget must be a number of MB, got '{budget}'")
+
+        results_cache = ResultsCache(int(budget * 1024 * 1024))
+        logging.info(f"Results cache: the results are loaded on demand, with a memory budget of {budget:.0f} MB")
+
+    return results_cache
+
+
+def spill_entry(entry, cache=None):
+    """
+    Moves the results of 'entry' to the spill file, if the results cache is enabled.
+    """
+    if cache is None:
+        cache = get_results_cache()
+        if cache is None:
+            return
+
+    if entry.is_gathered or isinstance(entry._results, common.LazyResults):
+        return
+
+    try:
+        entry.results = cache.spill(entry._results)
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        # the results stay in memory
+        with cache.lock:
+            cache.not_spilled += 1
+            first = cache.not_spilled == 1
+
+        if first:
+            logging.warning(f"Results cache: cannot spill the results of {entry.location}, "
+                            f"keeping them in memory ({e.__class__.__name__}: {e}). "
+                            "The next results that cannot be spilled won't be reported.")
+
+
+def spill_matrix(matrix):
+    """
+    Moves the results of all the entries of 'matrix' to the spill file, if the results cache is enabled.
+    """
+    cache = get_results_cache()
+    if cache is None:
+        return
+
+    for entry in matrix.processed_map.values():
+        spill_entry(entry, cache)
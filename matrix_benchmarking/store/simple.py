@@ -5,13 +5,23 @@ import pathlib
 import yaml
 import json
 import types
+import collections
+import contextlib
+import multiprocessing
+import concurrent.futures
+import time
 
 import pydantic
+try: import orjson
+except ImportError: orjson = None
 
 import matrix_benchmarking.matrix as matrix
 import matrix_benchmarking.common as common
 import matrix_benchmarking.store as store
 import matrix_benchmarking.cli_args as cli_args
+import matrix_benchmarking.store.parse_index as parse_index
+import matrix_benchmarking.store.parse_profile as parse_profile
+import matrix_benchmarking.store.lts_columnar as lts_columnar
 from matrix_benchmarking import download_lts
 
 def invalid_directory(dirname, settings, reason, warn=False):
@@ -65,27 +75,98 @@ def parse_old_settings(filename):
     return settings
 
 
-def parse_settings(dirname):
-    import_settings = {}
+class SettingsResolver():
+    """
+    Resolves the hierarchical settings of the results directories.
 
-    # search for settings[.*] in dirname and all of its parent directories.
-    # start in the top-most parent, so that each subdirectory overrides its parents.
-    for parent_dir in list(reversed([dirname] + list(dirname.parents))):
-        for filename in list(parent_dir.glob("settings")) + list(parent_dir.glob("settings.*")):
+    The settings files of each parent directory are parsed at most once,
+    and the merged settings of each directory prefix are cached. The
+    results directories get a copy of their parent's merged settings,
+    overridden with their own settings files.
+    """
+
+    def __init__(self):
+        self.merged_settings = {}
+
+        self.files_loaded = 0
+        self.files_loads_saved = 0
+
+    def _load_directory_settings(self, dirname, settings):
+        nb_files = 0
+        for filename in list(dirname.glob("settings")) + list(dirname.glob("settings.*")):
+            nb_files += 1
             if filename.suffix not in (".yaml", ".yml"): # deprecated
                 logging.debug(f"Found deprecated 'settings' file in {dirname}: {filename}")
 
-                import_settings.update(parse_old_settings(filename))
+                settings.update(parse_old_settings(filename))
                 continue
             with open(filename) as f:
-                settings = yaml.safe_load(f)
-            import_settings.update(settings)
+                settings.update(yaml.safe_load(f))
+
+        self.files_loaded += nb_files
+
+        return nb_files
+
+    def _get_parent_settings(self, dirname):
+        try:
+            merged_settings, nb_files = self.merged_settings[dirname]
+            self.files_loads_saved += nb_files
+
+            return merged_settings, nb_files
+        except KeyError: pass
+
+        if dirname.parent == dirname: # the top-most parent ('/', or '.' for the relative paths)
+            parent_settings, parent_nb_files = {}, 0
+        else:
+            parent_settings, parent_nb_files = self._get_parent_settings(dirname.parent)
+
+        merged_settings = dict(parent_settings)
+        nb_files = parent_nb_files + self._load_directory_settings(dirname, merged_settings)
+
+        self.merged_settings[dirname] = merged_settings, nb_files
+
+        return merged_settings, nb_files
+
+    def get_inherited_settings(self, dirname):
+        """
+        Returns the merged settings of 'dirname' and its parents. Must not be modified.
+        """
+        merged_settings, _ = self._get_parent_settings(dirname)
+
+        return merged_settings
+
+    def get_settings(self, dirname):
+        # start in the top-most parent, so that each subdirectory overrides its parents.
+        parent_settings, _ = self._get_parent_settings(dirname.parent) \
+            if dirname.parent != dirname else ({}, 0)
 
-    return import_settings
+        import_settings = dict(parent_settings)
+        self._load_directory_settings(dirname, import_settings)
 
+        return import_settings
 
-def _parse_directory(results_dir, dirname):
-    import_settings = parse_settings(dirname)
+    def log_stats(self):
+        logging.info(f"Settings: {self.files_loaded} files loaded, "
+                     f"{self.files_loads_saved} loads saved by the cache "
+                     f"({len(self.merged_settings)} directories cached)")
+
+
+settings_resolver = SettingsResolver()
+
+def reset_settings_cache():
+    global settings_resolver
+    settings_resolver = SettingsResolver()
+
+
+def parse_settings(dirname):
+    # search for settings[.*] in dirname and all of its parent directories.
+    with parse_profile.stage("settings"):
+        return settings_resolver.get_settings(dirname)
+
+
+def _parse_directory(results_dir, dirname, parsed_entries=None, import_settings=None):
+    if import_settings is None:
+        import_settings = parse_settings(dirname)
 
     if store.should_be_filtered_out(import_settings):
         return
@@ -114,6 +195,11 @@ def _parse_directory(results_dir, dirname):
         else:
             entry_import_settings = import_settings
 
+        if parsed_entries is not None:
+            # parallel parsing: the entries are added to the matrix by the main process
+            parsed_entries.append((entry_import_settings, results, exit_code))
+            return
+
         store.add_to_matrix(entry_import_settings,
                             pathlib.Path(dirname),
                             results, exit_code,
@@ -127,6 +213,129 @@ def _parse_directory(results_dir, dirname):
         logging.info("")
         raise e
 
+    return True
+
+
+def _parse_directory_in_worker(results_dir, dirname, import_settings=None):
+    parsed_entries = []
+    if not _parse_directory(results_dir, dirname, parsed_entries, import_settings):
+        return None # filtered out or invalid directory
+
+    return parsed_entries
+
+
+def _add_parsed_entries_to_matrix(dirname, parsed_entries):
+    for entry_import_settings, results, exit_code in parsed_entries:
+        store.add_to_matrix(entry_import_settings,
+                            pathlib.Path(dirname),
+                            results, exit_code,
+                            _duplicated_directory)
+
+
+def get_parse_workers():
+    parse_workers = cli_args.kwargs.get("parse_workers") if cli_args.kwargs else None
+    if not parse_workers:
+        return 1
+
+    try:
+        parse_workers = int(parse_workers)
+    except ValueError:
+        raise ValueError(f"--parse-workers must be an integer, got '{parse_workers}'")
+
+    if parse_workers < 0:
+        return os.cpu_count() or 1
+
+    return parse_workers
+
+
+def _parse_directories(results_dir, results_directories, index=None):
+    parse_workers = get_parse_workers()
+
+    if parse_profile.profiler is not None and parse_workers > 1:
+        logging.info("Parse profile: the directories are parsed sequentially when profiling.")
+        parse_workers = 1
+
+    if index is None and parse_workers <= 1:
+        for dirname in results_directories:
+            with parse_profile.directory(dirname):
+                _parse_directory(results_dir, dirname)
+        return
+
+    if parse_workers > 1:
+        logging.info(f"Parsing the results directories with {parse_workers} workers ...")
+        # 'fork' so that the workers inherit the workload module and its registered parser
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=parse_workers,
+                                                          mp_context=multiprocessing.get_context("fork"))
+    else:
+        executor = None
+
+    # the directories are added to the matrix in the discovery order,
+    # so the duplicated keys are detected exactly as in the sequential mode
+    pending = collections.deque()
+
+    def add_pending_to_matrix(wait):
+        while pending:
+            dirname, fingerprint, future, parsed_entries = pending[0]
+            if future is not None:
+                if not (wait or future.done()):
+                    break
+                parsed_entries = future.result()
+
+            pending.popleft()
+
+            if parsed_entries is None:
+                continue # filtered out or invalid directory
+
+            if fingerprint is not None:
+                index.record(dirname, fingerprint, parsed_entries)
+
+            _add_parsed_entries_to_matrix(dirname, parsed_entries)
+
+    def parse_directory(dirname):
+        if index is not None:
+            with parse_profile.stage("parse_index"):
+                fingerprint = parse_index.directory_fingerprint(dirname)
+                parsed_entries = index.lookup(dirname, fingerprint)
+
+            if parsed_entries is not None:
+                pending.append((dirname, None, None, parsed_entries))
+                add_pending_to_matrix(wait=False)
+                return
+        else:
+            fingerprint = None
+
+        # the settings are resolved here, so that the settings cache is shared by all the directories
+        import_settings = parse_settings(dirname)
+
+        if executor is not None:
+            future = executor.submit(_parse_directory_in_worker, results_dir, dirname, import_settings)
+            pending.append((dirname, fingerprint, future, None))
+        else:
+            parsed_entries = _parse_directory_in_worker(results_dir, dirname, import_settings)
+            pending.append((dirname, fingerprint, None, parsed_entries))
+
+        add_pending_to_matrix(wait=False)
+
+    with executor or contextlib.nullcontext():
+        for dirname in results_directories:
+            with parse_profile.directory(dirname):
+                parse_directory(dirname)
+
+        add_pending_to_matrix(wait=True)
+
+
+def get_parse_index(results_dir):
+    if not (cli_args.kwargs and cli_args.kwargs.get("parse_index")):
+        return None
+
+    if cli_args.kwargs.get("clean"):
+        logging.info("Parse index: disabled in cleanup mode.")
+        return None
+
+    index = parse_index.ParseIndex(results_dir, parse_index.workload_fingerprint(custom_parse_results))
+    index.load()
+
+    return index
 
 # ---
 
@@ -137,7 +346,8 @@ def _parse_results(add_to_matrix, dirname, import_settings, exit_code):
     if custom_parse_results is None:
         raise RuntimeError("simple store: No data parser registered :/")
 
-    return custom_parse_results(add_to_matrix, dirname, import_settings, exit_code)
+    with parse_profile.stage("parse_results"):
+        return custom_parse_results(add_to_matrix, dirname, import_settings, exit_code)
 
 def build_lts_payloads():
     if custom_build_lts_payloads is None:
@@ -176,10 +386,127 @@ class RecursiveNamespace(types.SimpleNamespace):
                 setattr(self, key, list(map(self.map_entry, val)))
 
 
-def parse_lts_data(lts_results_dir=None):
-    if lts_results_dir is None:
-        lts_results_dir = pathlib.Path(cli_args.kwargs["lts_results_dirname"])
+# Similar to RecursiveNamespace, but the nested dicts and lists are converted on their first access.
+# Accessing __dict__ (or vars()) converts all the direct children of the namespace.
+# Only the loaded values are converted, the values assigned afterwards are kept as they are.
+class LazyRecursiveNamespace(RecursiveNamespace):
+    __slots__ = ("_pending", )
+
+    @staticmethod
+    def map_entry(entry):
+        if isinstance(entry, dict):
+            return LazyRecursiveNamespace(**entry)
 
+        return entry
+
+    def __init__(self, **kwargs):
+        types.SimpleNamespace.__init__(self, **kwargs)
+
+        # the keys of the loaded dicts and lists, not converted yet
+        object.__setattr__(self, "_pending", {key for key, val in kwargs.items() if type(val) in (dict, list)})
+
+    @staticmethod
+    def _restore(attrs, pending):
+        namespace = LazyRecursiveNamespace.__new__(LazyRecursiveNamespace)
+        object.__getattribute__(namespace, "__dict__").update(attrs)
+        object.__setattr__(namespace, "_pending", pending)
+
+        return namespace
+
+    def __reduce__(self):
+        # types.SimpleNamespace.__reduce__ doesn't keep the slots
+        return LazyRecursiveNamespace._restore, (object.__getattribute__(self, "__dict__"),
+                                                 object.__getattribute__(self, "_pending"))
+
+    def __setattr__(self, name, value):
+        object.__getattribute__(self, "_pending").discard(name)
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        object.__getattribute__(self, "_pending").discard(name)
+        object.__delattr__(self, name)
+
+    def _convert_attr(self, attrs, key, val):
+        pending = object.__getattribute__(self, "_pending")
+        if key not in pending:
+            return val
+
+        pending.discard(key)
+
+        if type(val) == dict:
+            val = attrs[key] = LazyRecursiveNamespace(**val)
+        elif type(val) == list:
+            val = attrs[key] = list(map(LazyRecursiveNamespace.map_entry, val))
+
+        return val
+
+    def __getattribute__(self, name):
+        if name.startswith("__"):
+            if name != "__dict__":
+                return object.__getattribute__(self, name)
+
+            attrs = object.__getattribute__(self, "__dict__")
+            for key in list(object.__getattribute__(self, "_pending")):
+                LazyRecursiveNamespace._convert_attr(self, attrs, key, attrs[key])
+
+            return attrs
+
+        attrs = object.__getattribute__(self, "__dict__")
+        try:
+            val = attrs[name]
+        except KeyError:
+            return object.__getattribute__(self, name) # methods, or AttributeError
+
+        # not self._convert_attr, to avoid going through __getattribute__
+        return LazyRecursiveNamespace._convert_attr(self, attrs, name, val)
+
+
+def _load_json_file(filepath):
+    with open(filepath, "rb") as f:
+        content = f.read()
+
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            pass # eg, NaN values aren't supported by orjson, fallback to json
+
+    return json.loads(content)
+
+
+def _duplicated_lts_entry(import_key, old_entry, old_location, new_results, new_location):
+    logging.warning(f"duplicated results key: {import_key}")
+
+    logging.warning(f"  old: {old_location} | {old_entry.results.metadata.test_uuid}")
+    logging.warning(f"  new: {new_location} | {new_results.metadata.test_uuid}")
+
+
+def _add_lts_document_to_matrix(filepath, document):
+    lts_payload = LazyRecursiveNamespace.map_entry(document)
+
+    lts_settings = lts_payload.metadata.settings
+
+    import_settings = dict(lts_settings.__dict__)
+
+    import_settings["@timestamp"] = str(lts_payload.metadata.start)
+
+    exit_code = getattr(lts_payload.metadata, "exit_code", None)
+
+    store.add_to_matrix(import_settings, filepath,
+                        lts_payload, exit_code,
+                        _duplicated_lts_entry,
+                        matrix=common.LTS_Matrix)
+
+
+def list_lts_files(lts_dir, files=None):
+    if files is None:
+        files = os.listdir(lts_dir)
+
+    return [filename for filename in sorted(files)
+            if filename != download_lts.LTS_ANCHOR_NAME and not filename.startswith(".")]
+
+
+def _iter_lts_directories(lts_results_dir):
     def has_lts_anchor(files):
         return download_lts.LTS_ANCHOR_NAME in files
 
@@ -189,40 +516,155 @@ def parse_lts_data(lts_results_dir=None):
         if "skip" in files: continue
         if not has_lts_anchor(files): continue
 
-        with open(this_dir / download_lts.LTS_ANCHOR_NAME) as f:
-            lts_anchor = yaml.safe_load(f)
+        yield this_dir, list_lts_files(this_dir, files)
 
-        for filename in files:
-            if filename == download_lts.LTS_ANCHOR_NAME: continue
-            if filename.startswith("."): continue
 
-            filepath = this_dir / filename
-            with open(filepath) as f:
-                document = json.load(f)
+def build_lts_columnar_dataset(lts_dir):
+    lts_dir = pathlib.Path(lts_dir)
 
-            lts_payload = RecursiveNamespace.map_entry(document)
+    return lts_columnar.write_dataset(lts_dir, list_lts_files(lts_dir), _load_json_file)
 
-            lts_settings = lts_payload.metadata.settings
 
-            import_settings = dict(lts_settings.__dict__)
+def parse_lts_data(lts_results_dir=None):
+    """
+    Loads the LTS results into common.LTS_Matrix.
 
-            import_settings["@timestamp"] = str(lts_payload.metadata.start)
+    With the lts_columnar flag, when a directory has an up-to-date
+    columnar dataset (see download_lts --columnar), it is loaded instead
+    of the JSON files.
+    """
+    if lts_results_dir is None:
+        lts_results_dir = pathlib.Path(cli_args.kwargs["lts_results_dirname"])
 
-            exit_code = getattr(lts_payload.metadata, "exit_code", None)
+    use_columnar = cli_args.kwargs.get("lts_columnar") if cli_args.kwargs else False
 
-            def _duplicated_entry(import_key, old_entry, old_location, new_results, new_location):
-                logging.warning(f"duplicated results key: {import_key}")
+    start = time.time()
 
-                logging.warning(f"  old: {old_location} | {old_entry.results.metadata.test_uuid}")
-                logging.warning(f"  new: {new_location} | {new_results.metadata.test_uuid}")
+    # (filepath, document) tuples, in the files order. The document is None for the JSON files to load.
+    lts_documents = []
+    for this_dir, filenames in _iter_lts_directories(lts_results_dir):
+        if use_columnar and lts_columnar.is_up_to_date(this_dir, filenames):
+            logging.info(f"Loading the LTS files of {this_dir} from its columnar dataset ...")
+            lts_documents += [(this_dir / filename, document) for filename, document
+                              in lts_columnar.read_dataset(this_dir)]
+            continue
+
+        lts_documents += [(this_dir / filename, None) for filename in filenames]
+
+    filepaths = [filepath for filepath, document in lts_documents if document is None]
+
+    parse_workers = get_parse_workers()
+    backend = "orjson" if orjson is not None else "json"
+    logging.info(f"Loading {len(filepaths)} LTS files with {parse_workers} worker(s) and the {backend} backend ...")
+
+    if parse_workers > 1 and len(filepaths) > 1:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=parse_workers,
+                                                          mp_context=multiprocessing.get_context("fork"))
+        chunksize = max(1, min(256, len(filepaths) // (parse_workers * 8)))
+        json_documents = executor.map(_load_json_file, filepaths, chunksize=chunksize)
+    else:
+        executor = None
+        json_documents = map(_load_json_file, filepaths)
+
+    with executor or contextlib.nullcontext():
+        # the JSON documents are received in the files order, as they are loaded
+        for filepath, document in lts_documents:
+            if document is None:
+                document = next(json_documents)
+
+            _add_lts_document_to_matrix(filepath, document)
+
+    duration = time.time() - start
+    logging.info(f"Loaded {len(lts_documents)} LTS documents in {duration:.1f}s "
+                 f"({len(lts_documents) / duration if duration else 0:.0f} documents/s)")
 
-            store.add_to_matrix(import_settings, filepath,
-                                lts_payload, exit_code,
-                                _duplicated_entry,
-                                matrix=common.LTS_Matrix)
-        pass
 # ---
 
+def _has_settings(dirname, files):
+    if "settings" in files:
+        logging.debug(f"Found deprecated 'settings' file in {dirname} ...")
+        return True # deprecated
+    if "settings.yml" in files:
+        logging.warning(f"Found settings file with invalid extention 'settings.yml' file in {dirname} ...")
+        return True
+
+    if "settings.yaml" in files: return True
+
+    return False
+
+
+def iter_results_directories(results_dir, filter_pushdown=False):
+    """
+    Walks 'results_dir' (following the symlinks) and yields the results directories,
+    ie, the directories with a settings file.
+
+    The walk doesn't descend into the results directories (nested
+    results directories are ignored) nor into the directories with a
+    'skip' file. The symlink loops are detected and not followed.
+
+    If 'filter_pushdown' is set, the walk doesn't descend into the
+    directories whose inherited settings are already filtered out. The
+    results directories below them that override the filtered settings
+    are skipped as well, so it must only be used when the filtered
+    settings aren't overridden (see the filter_pushdown flag).
+    """
+
+    def scan(dirname):
+        files = set()
+        subdirs = []
+        try:
+            with os.scandir(dirname) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir() # follows the symlinks
+                    except OSError:
+                        is_dir = False
+
+                    if is_dir:
+                        subdirs.append(entry)
+                    else:
+                        files.add(entry.name)
+        except OSError as e:
+            logging.warning(f"Cannot list the content of {dirname}: {e}")
+
+        return files, sorted(subdirs, key=lambda entry: entry.name)
+
+    def dir_id(stat):
+        return stat.st_dev, stat.st_ino
+
+    results_dir = pathlib.Path(results_dir)
+    # stack of (directory, ids of the directory and its parents)
+    to_visit = [(results_dir, frozenset([dir_id(results_dir.stat())]))]
+    while to_visit:
+        this_dir, parent_ids = to_visit.pop()
+
+        files, subdirs = scan(this_dir)
+
+        if "skip" in files:
+            continue
+
+        if _has_settings(this_dir, files):
+            yield this_dir
+            continue # we don't want nested results dirs
+
+        if filter_pushdown and store.should_be_filtered_out(settings_resolver.get_inherited_settings(this_dir)):
+            logging.debug(f"{this_dir}: filtered out, not descending into it.")
+            continue
+
+        # reversed, so that the subdirectories are visited in the alphabetical order
+        for entry in reversed(subdirs):
+            try:
+                subdir_id = dir_id(entry.stat())
+            except OSError:
+                continue # vanished
+
+            if subdir_id in parent_ids:
+                logging.warning(f"Symlink loop detected at {entry.path}, not following it.")
+                continue
+
+            to_visit.append((this_dir / entry.name, parent_ids | {subdir_id}))
+
+
 def parse_data(results_dir=None):
     if results_dir is None:
         results_dir = pathlib.Path(cli_args.kwargs["results_dirname"])
@@ -233,36 +675,20 @@ def parse_data(results_dir=None):
     if not results_dir.is_dir():
         raise FileNotFoundError(f"Results directory '{results_dir}' is not a directory ...")
 
-    def has_settings(files):
-        if "settings" in files:
-            logging.debug(f"Found deprecated 'settings' file ...")
-            return True # deprecated
-        if "settings.yml" in files:
-            logging.warning(f"Found settings file with invalid extention 'settings.yml' file ...")
-            return True
-
-        if "settings.yaml" in files: return True
+    reset_settings_cache()
 
-        return False
-
-    results_directories = []
-    path = os.walk(results_dir, followlinks=True)
-    for _this_dir, directories, files in path:
-        if "skip" in files: continue
-        if not has_settings(files): continue
+    filter_pushdown = bool(cli_args.experiment_filters) and bool(cli_args.kwargs.get("filter_pushdown"))
+    results_directories = iter_results_directories(results_dir, filter_pushdown=filter_pushdown)
 
-        this_dir = pathlib.Path(_this_dir)
+    index = get_parse_index(results_dir)
 
-        is_subdir_of_results_dir = False
-        for existing_results_directory in results_directories:
-            if existing_results_directory in this_dir.parents:
-                is_subdir_of_results_dir = True
-                break
-        if is_subdir_of_results_dir:
-            # we don't want nested results dirs
-            continue
+    parse_profile.start_profiling()
+    try:
+        _parse_directories(results_dir, results_directories, index)
+    finally:
+        parse_profile.stop_profiling()
 
-        relative = this_dir.relative_to(results_dir)
+    settings_resolver.log_stats()
 
-        results_directories.append(this_dir)
-        _parse_directory(results_dir, this_dir)
+    if index is not None:
+        index.save()
@@ -0,0 +1,158 @@
+import os
+import logging
+import pathlib
+import pickle
+import hashlib
+import time
+
+import matrix_benchmarking.common as common
+import matrix_benchmarking.cli_args as cli_args
+import matrix_benchmarking.store.parse_index as parse_index
+import matrix_benchmarking.store.results_cache as results_cache
+
+# bump this version when the format of the snapshot (or of the Matrix objects) changes
+SNAPSHOT_VERSION = 1
+
+# the flags changing the content of the parsed Matrix
+SNAPSHOT_KWARGS = ("lazy_missing_settings", "results_memory_budget", "filter_pushdown")
+
+
+def get_snapshot_path(results_dir, execution_mode):
+    results_dir = pathlib.Path(results_dir).absolute()
+
+    # each command keeps its own snapshot
+    return results_dir.parent / f".{results_dir.name}.{execution_mode}.matbench_snapshot"
+
+
+def _lts_fingerprint(lts_results_dir):
+    fingerprint = []
+    for this_dir, directories, files in os.walk(lts_results_dir, followlinks=True):
+        directories.sort()
+        for filename in sorted(files):
+            path = pathlib.Path(this_dir) / filename
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue # broken symlink
+
+            fingerprint.append((str(path.relative_to(lts_results_dir)), stat.st_mtime_ns, stat.st_size))
+
+    return fingerprint
+
+
+def tree_fingerprint(results_dir, lts_results_dir=None):
+    """
+    Digest of the mtimes and sizes of all the files of the results tree
+    (and of the LTS results directory, if any).
+    """
+    fingerprint = [parse_index.directory_fingerprint(pathlib.Path(results_dir).absolute())]
+    if lts_results_dir:
+        fingerprint.append(_lts_fingerprint(lts_results_dir))
+
+    return hashlib.sha256(repr(fingerprint).encode()).hexdigest()
+
+
+class MatrixSnapshot():
+    """
+    Serialized version of common.Matrix and common.LTS_Matrix, as they are
+    after the parsing of the results and of the LTS results.
+
+    The values of the entries' stats are saved with the Matrix (see
+    StatsEngine.compute_all), and restored once the stats of the plotting
+    module are registered.
+    """
+
+    def __init__(self, workload_store, results_dir, lts_results_dir=None, execution_mode=None, kwargs=None):
+        self.results_dir = pathlib.Path(results_dir)
+        self.lts_results_dir = pathlib.Path(lts_results_dir) if lts_results_dir else None
+        self.execution_mode = execution_mode
+        self.kwargs = {key: (kwargs or {}).get(key) for key in SNAPSHOT_KWARGS}
+        self.path = get_snapshot_path(results_dir, execution_mode)
+
+        self.workload_fingerprint = parse_index.workload_fingerprint(workload_store)
+        self.tree_fingerprint = None
+
+        self.stats_values = {} # stat name -> value per record, set by load()
+
+    def _key(self):
+        if self.tree_fingerprint is None:
+            self.tree_fingerprint = tree_fingerprint(self.results_dir, self.lts_results_dir)
+
+        return dict(
+            version=SNAPSHOT_VERSION,
+            workload_fingerprint=self.workload_fingerprint,
+            tree_fingerprint=self.tree_fingerprint,
+            experiment_filters=cli_args.experiment_filters,
+            execution_mode=self.execution_mode,
+            kwargs=self.kwargs,
+        )
+
+    def load(self):
+        """
+        Restores common.Matrix and common.LTS_Matrix from the snapshot.
+        Returns False if the snapshot doesn't exist or is outdated.
+        """
+        if not self.path.exists():
+            logging.info(f"Matrix snapshot: {self.path} does not exist.")
+            return False
+
+        start = time.time()
+        try:
+            with open(self.path, "rb") as f:
+                key = pickle.load(f)
+                if key != self._key():
+                    logging.info(f"Matrix snapshot: {self.path} is outdated, ignoring it.")
+                    return False
+
+                matrices = pickle.load(f)
+                stats_values = pickle.load(f)
+        except Exception as e:
+            logging.warning(f"Matrix snapshot: cannot load {self.path}, ignoring it. ({e.__class__.__name__}: {e})")
+            return False
+
+        # the Matrix objects are imported directly by the other modules, update them in place
+        for matrix, state in zip((common.Matrix, common.LTS_Matrix), matrices):
+            matrix.__dict__.clear()
+            matrix.__dict__.update(state)
+            # the snapshot contains the results themselves, not the spill file handles
+            results_cache.spill_matrix(matrix)
+
+        self.stats_values = stats_values
+
+        logging.info(f"Matrix snapshot: loaded {len(common.Matrix.processed_map)} results "
+                     f"and {len(common.LTS_Matrix.processed_map)} LTS results "
+                     f"from {self.path} in {time.time() - start:.1f}s")
+
+        return True
+
+    def save(self, stats_values=None):
+        """
+        Saves common.Matrix and common.LTS_Matrix, and the values of the
+        entries' stats (see StatsEngine.compute_all) if provided.
+        """
+        matrices = [common.Matrix.__dict__, common.LTS_Matrix.__dict__]
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(self._key(), f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(matrices, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(stats_values or {}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.warning(f"Matrix snapshot: cannot save {self.path} ({e.__class__.__name__}: {e})")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        logging.info(f"Matrix snapshot: saved into {self.path}")
+
+
+def get_matrix_snapshot(workload_store):
+    if not (cli_args.kwargs and cli_args.kwargs.get("snapshot")):
+        return None
+
+    return MatrixSnapshot(workload_store,
+                          cli_args.kwargs["results_dirname"],
+                          cli_args.kwargs.get("lts_results_dirname"),
+                          cli_args.kwargs.get("execution_mode"),
+                          cli_args.kwargs)
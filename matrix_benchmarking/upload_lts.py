@@ -25,6 +25,7 @@ def main(
         filters: list[str] = [],
         dry_run: bool = False,
         upload_by_kpi: bool = False,
+        parse_workers: int = 0,
     ):
     """
 Upload MatrixBenchmark LTS payloads to OpenSearch
@@ -46,11 +47,12 @@ Args:
     filters: If provided, parse and upload only the experiment matching the filters. Eg: expe=expe1:expe2,something=true. (Optional.)
     dry_run: If provided, only parse results and not upload results to horreum. (Optional.)
     upload_by_kpi: If enabled, upload the KPIs in a dedicated index (<opensearch_index>.<kpi_name>)
+    parse_workers: If greater than 1, parse the results directories and load the LTS files in parallel with this number of worker processes. -1 for one worker per CPU. (Optional.)
     """
 
     kwargs = dict(locals()) # capture the function arguments
 
-    optionals_flags = ["filters", "workload_base_dir", "dry_run", "upload_by_kpi"]
+    optionals_flags = ["filters", "workload_base_dir", "dry_run", "upload_by_kpi", "parse_workers"]
     safe_flags = ["results_dirname", "workload", "opensearch_index"] + optionals_flags
 
     cli_args.setup_env_and_kwargs(kwargs)
@@ -3,6 +3,8 @@ import logging
 
 import matrix_benchmarking.matrix
 import matrix_benchmarking.store as store
+import matrix_benchmarking.store.snapshot as store_snapshot
+import matrix_benchmarking.store.results_cache as results_cache
 import matrix_benchmarking.common as common
 import matrix_benchmarking.cli_args as cli_args
 
@@ -11,7 +13,21 @@ def main(workload: str = "",
          results_dirname: str = "",
          lts_results_dirname: str = "",
          filters: list[str] = [],
-         generate: str = ""):
+         generate: str = "",
+         generate_workers: int = 0,
+         image_cache_dir: str = "",
+         compact_reports: bool = False,
+         parse_workers: int = 0,
+         parse_index: bool = False,
+         parse_profile: str = "",
+         lts_columnar: bool = False,
+         filter_pushdown: bool = False,
+         lazy_missing_settings: bool = False,
+         results_memory_budget: int = 0,
+         figure_cache_size: int = 0,
+         figure_cache_dir: str = "",
+         background_workers: int = 0,
+         snapshot: bool = False):
     """
 Visualize MatrixBenchmarking results.
 
@@ -21,7 +37,21 @@ Env:
     MATBENCH_RESULTS_DIRNAME
     MATBENCH_LTS_RESULTS_DIRNAME
     MATBENCH_GENERATE
+    MATBENCH_GENERATE_WORKERS
+    MATBENCH_IMAGE_CACHE_DIR
+    MATBENCH_COMPACT_REPORTS
     MATBENCH_FILTERS
+    MATBENCH_PARSE_WORKERS
+    MATBENCH_PARSE_INDEX
+    MATBENCH_PARSE_PROFILE
+    MATBENCH_LTS_COLUMNAR
+    MATBENCH_FILTER_PUSHDOWN
+    MATBENCH_LAZY_MISSING_SETTINGS
+    MATBENCH_RESULTS_MEMORY_BUDGET
+    MATBENCH_FIGURE_CACHE_SIZE
+    MATBENCH_FIGURE_CACHE_DIR
+    MATBENCH_BACKGROUND_WORKERS
+    MATBENCH_SNAPSHOT
 
 See the `FLAGS` section for the descriptions.
 
@@ -31,8 +61,22 @@ Args:
     results_dirname: Name of the directory where the results will be stored.  (Mandatory.)
     lts_results_dirname: Name of the directory where the LTS results are stored. (Mandatory.)
     generate: If set, the value is used as query to generates image files instead of running the Web UI.
+    generate_workers: If greater than 1, compute and save the figures of 'generate' in parallel with this number of worker processes. -1 for one worker per CPU. (Optional.)
+    image_cache_dir: If set, save the images exported by 'generate' into this directory, keyed by the content of their figure, and copy them from there instead of rendering them again when the figure didn't change. (Optional.)
+    compact_reports: If 'True', the HTML files of the figures generated by 'generate' load a plotly.js library shared by all the files, and store the figure data in a compact format. (Optional.)
     filters: If provided, parse only the experiment matching the filters. Eg: expe=expe1:expe2,something=true.
     lts: If 'True', invoke the LTS parser only.
+    parse_workers: If greater than 1, parse the results directories and load the LTS files in parallel with this number of worker processes. -1 for one worker per CPU. (Optional.)
+    parse_index: If 'True', keep an index of the parsed results next to the results directory, and reload the unchanged directories from it. (Optional.)
+    parse_profile: If set, profile the parsing of the results directories, log the slowest directories and the time spent in each parsing stage, and save the measurements into this JSON file. (Optional.)
+    lts_columnar: If 'True', load the LTS results of the directories that have an up-to-date columnar dataset (see download_lts --columnar) from this dataset instead of their JSON files. (Optional.)
+    filter_pushdown: If 'True' with 'filters', don't walk into the directories whose inherited settings are filtered out. Faster on large trees, but the results directories overriding a filtered setting in their own settings file are skipped. (Optional.)
+    lazy_missing_settings: If 'True', don't store the missing settings in the entries, resolve them to None when they are read through entry.settings.<key> or entry.get_settings(). (Optional.)
+    results_memory_budget: If greater than 0, store the parsed results in a temporary spill file, and load them on demand, keeping at most this amount of MB of results in memory. (Optional.)
+    figure_cache_size: If greater than 0, keep this number of figures generated by the Web UI in memory, and serve them again without calling the plotting functions when the same view is requested. (Optional.)
+    figure_cache_dir: If set with figure_cache_size, also save the cached figures into this directory, and reuse them at the next start if the results and the workload module didn't change. (Optional.)
+    background_workers: If greater than 0, compute the figures of the Web UI in the background with this number of worker threads, show their progress, and cancel them when a newer selection arrives. (Optional.)
+    snapshot: If 'True', save the parsed results next to the results directory, and reload them at the next start if the workload module and the results didn't change. (Optional.)
 """
     kwargs = dict(locals()) # capture the function arguments
 
@@ -57,23 +101,34 @@ Args:
 
         # ---
 
-        logging.info(f"Loading results ... ")
-        workload_store.parse_data()
-        logging.info(f"Loading results ... done. Found {len(common.Matrix.processed_map)} results.")
-        if not common.Matrix.processed_map:
-            logging.error("Not result found, exiting.")
-            return 1
+        matrix_snapshot = store_snapshot.get_matrix_snapshot(workload_store)
 
-        common.Matrix.uniformize_settings_keys()
+        snapshot_loaded = matrix_snapshot and matrix_snapshot.load()
+        if snapshot_loaded:
+            common.Matrix.print_settings_to_log()
+            if kwargs.get("lts_results_dirname"):
+                common.LTS_Matrix.print_settings_to_log()
+        else:
+            logging.info(f"Loading results ... ")
+            workload_store.parse_data()
+            logging.info(f"Loading results ... done. Found {len(common.Matrix.processed_map)} results.")
+            if not common.Matrix.processed_map:
+                logging.error("Not result found, exiting.")
+                return 1
 
-        common.Matrix.print_settings_to_log()
+            common.Matrix.uniformize_settings_keys(lazy=kwargs.get("lazy_missing_settings"))
 
-        if kwargs.get("lts_results_dirname"):
-            logging.info("--- LTS --- ")
-            workload_store.parse_lts_data()
-            common.LTS_Matrix.print_settings_to_log()
-            logging.info(f"Loading LTS results ... done. Found {len(common.LTS_Matrix.processed_map)} results.")
+            common.Matrix.print_settings_to_log()
 
+            if kwargs.get("lts_results_dirname"):
+                logging.info("--- LTS --- ")
+                workload_store.parse_lts_data()
+                common.LTS_Matrix.print_settings_to_log()
+                logging.info(f"Loading LTS results ... done. Found {len(common.LTS_Matrix.processed_map)} results.")
+
+
+        if cache := results_cache.get_results_cache():
+            cache.log_stats()
 
         try:
             ui.configure(kwargs, workload_store)
@@ -83,6 +138,12 @@ Args:
 
         table_stats.register_all()
 
+        if snapshot_loaded:
+            table_stats.stats_engine.set_values(matrix_snapshot.stats_values)
+        elif matrix_snapshot:
+            # the stats are computed once, and reloaded with the Matrix at the next start
+            matrix_snapshot.save(table_stats.stats_engine.compute_all())
+
         ui_web.run()
 
         return 0
@@ -0,0 +1,21 @@
+import types
+
+import matrix_benchmarking.cli_args as cli_args
+import matrix_benchmarking.plotting.ui.figure_cache as figure_cache
+
+
+def test_disk_fingerprint_depends_on_the_filters(tmp_path, monkeypatch):
+    (tmp_path / "results").mkdir()
+    module = types.ModuleType("fake.store")
+    module.__file__ = __file__
+
+    kwargs = dict(figure_cache_size=4, figure_cache_dir=str(tmp_path / "figures"),
+                  results_dirname=str(tmp_path / "results"))
+
+    def get_fingerprint(filters):
+        monkeypatch.setattr(cli_args, "experiment_filters", filters)
+        figure_cache.configure(kwargs, module, module)
+        return figure_cache.figure_cache.fingerprint
+
+    assert get_fingerprint({}) == get_fingerprint({})
+    assert get_fingerprint({}) != get_fingerprint({"expe": "a"})
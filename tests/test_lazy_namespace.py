@@ -0,0 +1,28 @@
+import pickle
+
+from matrix_benchmarking.store.simple import LazyRecursiveNamespace
+
+
+def test_loaded_values_are_converted_on_read():
+    namespace = LazyRecursiveNamespace.map_entry(dict(kpis=dict(k1=dict(value=1)), runs=[dict(idx=0)], count=2))
+
+    assert isinstance(namespace.kpis, LazyRecursiveNamespace)
+    assert namespace.kpis.k1.value == 1
+    assert isinstance(namespace.runs[0], LazyRecursiveNamespace)
+    assert namespace.count == 2
+
+
+def test_assigned_values_are_kept_as_they_are():
+    namespace = LazyRecursiveNamespace.map_entry(dict(kpis=dict(k1=dict(value=1))))
+
+    namespace.extra = dict(a=1)
+    namespace.kpis = dict(k2=2)
+    assert type(namespace.extra) is dict
+    assert type(namespace.kpis) is dict
+    assert type(vars(namespace)["extra"]) is dict
+
+    restored = pickle.loads(pickle.dumps(namespace))
+    assert type(restored.extra) is dict
+
+    loaded = pickle.loads(pickle.dumps(LazyRecursiveNamespace.map_entry(dict(kpis=dict(k1=1)))))
+    assert isinstance(loaded.kpis, LazyRecursiveNamespace)
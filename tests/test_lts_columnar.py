@@ -0,0 +1,31 @@
+import json
+import pathlib
+
+import pytest
+
+import matrix_benchmarking.store.lts_columnar as lts_columnar
+
+pytest.importorskip("pyarrow")
+
+
+def load_document(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_read_dataset_keeps_the_documents(tmp_path):
+    documents = {
+        "with_kpis.json": dict(metadata=dict(settings=dict(a=1)), kpis=dict(k1=dict(value=1.5)), results=dict(v=[1, 2])),
+        "without_kpis.json": dict(metadata=dict(settings=dict(a=2)), results=dict(v=[3])),
+        "null_kpis.json": dict(metadata=dict(settings=dict(a=3)), kpis=None),
+        "empty_kpis.json": dict(metadata=dict(settings=dict(a=4)), kpis={}),
+    }
+    for filename, document in documents.items():
+        with open(tmp_path / filename, "w") as f:
+            json.dump(document, f)
+
+    lts_columnar.write_dataset(tmp_path, list(documents), load_document)
+    assert lts_columnar.is_up_to_date(tmp_path, list(documents))
+
+    read_documents = dict(lts_columnar.read_dataset(tmp_path))
+    assert read_documents == documents
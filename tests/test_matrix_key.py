@@ -0,0 +1,74 @@
+import types
+import pickle
+import pathlib
+
+import matrix_benchmarking.common as common
+import matrix_benchmarking.cli_args as cli_args
+import matrix_benchmarking.store as store
+
+
+def build_matrix(entries_settings, lazy=False):
+    cli_args.kwargs = dict(clean=False, run=False, execution_mode="parse")
+    store.register_custom_rewrite_settings(lambda settings: settings)
+
+    duplicated = []
+    matrix = common.MatrixDefinition()
+    for idx, settings in enumerate(entries_settings):
+        store.add_to_matrix(dict(settings), pathlib.Path(f"/results/{idx}"), types.SimpleNamespace(), 0,
+                            lambda *args: duplicated.append(args), matrix=matrix)
+
+    matrix.uniformize_settings_keys(lazy=lazy)
+
+    return matrix, duplicated
+
+
+def test_explicit_none_value_is_not_a_missing_key():
+    assert common.MatrixKey({"a": 1}) != common.MatrixKey({"a": 1, "q": "None"})
+    assert common.MatrixKey({"a": 1}) != common.MatrixKey({"a": 1, "q": None})
+
+    for lazy in (False, True):
+        matrix, duplicated = build_matrix([{"a": 1}, {"a": 1, "q": "None"}], lazy=lazy)
+
+        assert not duplicated
+        assert len(matrix.processed_map) == 2
+
+
+def test_missing_value_lookup():
+    for lazy in (False, True):
+        matrix, _ = build_matrix([{"a": 1, "q": 2}, {"a": 2}], lazy=lazy)
+
+        entry = matrix.get_record({"a": 2, "q": None})
+        assert entry is not None and entry.location == pathlib.Path("/results/1")
+
+        settings = {"a": "---", "q": "---"}
+        setting_lists = [[("a", 1), ("a", 2)], [("q", 2), ("q", None)]]
+        locations = [str(entry.location) for entry in matrix.all_records(settings, setting_lists)]
+        assert locations == ["/results/0", "/results/1"]
+
+
+def test_key_pickling_keeps_the_missing_values_out():
+    matrix, _ = build_matrix([{"a": 1, "q": 2}, {"a": 2}])
+    entry = matrix.get_record({"a": 2, "q": None})
+
+    key = pickle.loads(pickle.dumps(entry.processed_key))
+    assert key == entry.processed_key and hash(key) == hash(entry.processed_key)
+    assert key != common.MatrixKey({"a": 2, "q": None})
+
+
+def test_key_index_is_kept_up_to_date():
+    matrix, _ = build_matrix([{"a": 1, "q": 2}, {"a": 2}])
+    assert matrix.get_record({"a": 2, "q": None}) is not None
+    assert matrix.key_index is not None
+
+    cli_args.kwargs = dict(clean=False, run=False, execution_mode="parse")
+    store.add_to_matrix({"a": 3}, pathlib.Path("/results/3"), types.SimpleNamespace(), 0,
+                        lambda *args: None, matrix=matrix)
+
+    # updated in place, not rebuilt at the next lookup
+    key_index = matrix.key_index
+    assert key_index is not None
+    assert matrix.get_record({"a": 3, "q": None}).location == pathlib.Path("/results/3")
+    assert matrix.key_index is key_index
+
+    matrix.key_index = None
+    assert matrix._get_key_index() == key_index
@@ -0,0 +1,28 @@
+import sys
+import importlib
+
+import matrix_benchmarking.store.parse_index as parse_index
+
+
+def test_workload_fingerprint_covers_the_subpackages(tmp_path, monkeypatch):
+    workload_dir = tmp_path / "fake_workload"
+    (workload_dir / "store").mkdir(parents=True)
+    (workload_dir / "plotting" / "report").mkdir(parents=True)
+
+    (workload_dir / "__init__.py").write_text("")
+    (workload_dir / "store" / "__init__.py").write_text("def parse(): pass\n")
+    (workload_dir / "plotting" / "__init__.py").write_text("")
+    (workload_dir / "plotting" / "report" / "__init__.py").write_text("")
+
+    monkeypatch.syspath_prepend(str(tmp_path))
+    workload_store = importlib.import_module("fake_workload.store")
+    try:
+        fingerprint = parse_index.workload_fingerprint(workload_store.parse)
+        assert fingerprint == parse_index.workload_fingerprint(workload_store.parse)
+
+        (workload_dir / "plotting" / "report" / "report.py").write_text("x = 1\n")
+        assert parse_index.workload_fingerprint(workload_store.parse) != fingerprint
+    finally:
+        for name in list(sys.modules):
+            if name.startswith("fake_workload"):
+                del sys.modules[name]
@@ -0,0 +1,50 @@
+import types
+import logging
+import threading
+
+import pytest
+
+import matrix_benchmarking.common as common
+import matrix_benchmarking.store.results_cache as results_cache
+
+
+class Entry():
+    # the attributes of common.MatrixEntry used by spill_entry
+    def __init__(self, location, results):
+        self.location = location
+        self.is_gathered = False
+        self._results = results
+
+    @property
+    def results(self):
+        if isinstance(self._results, common.LazyResults):
+            return self._results.load()
+        return self._results
+
+    @results.setter
+    def results(self, results):
+        self._results = results
+
+
+def test_unpicklable_results_stay_in_memory(caplog):
+    cache = results_cache.ResultsCache(1024 * 1024)
+
+    entries = [Entry(f"/results/{idx}", types.SimpleNamespace(lock=threading.Lock())) for idx in range(3)]
+    entries.append(Entry("/results/3", types.SimpleNamespace(value=3)))
+
+    with caplog.at_level(logging.WARNING):
+        for entry in entries:
+            results_cache.spill_entry(entry, cache)
+
+    assert len([record for record in caplog.records if "cannot spill" in record.message]) == 1
+    assert cache.get_stats()["not_spilled"] == 3
+    assert cache.get_stats()["spilled"] == 1
+
+    assert all(isinstance(entry.results.lock, type(threading.Lock())) for entry in entries[:3])
+    assert isinstance(entries[3]._results, results_cache.SpilledResults)
+    assert entries[3].results.value == 3
+
+
+def test_lazy_results_is_abstract():
+    with pytest.raises(TypeError):
+        common.LazyResults()
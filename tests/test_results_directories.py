@@ -0,0 +1,36 @@
+import pathlib
+
+import matrix_benchmarking.cli_args as cli_args
+import matrix_benchmarking.store.simple as store_simple
+
+
+def test_filtered_parent_settings_overridden_by_a_results_directory(tmp_path, monkeypatch):
+    group_dir = tmp_path / "group"
+    (group_dir / "run_a").mkdir(parents=True)
+    (group_dir / "run_b").mkdir()
+
+    (group_dir / "settings.common.yaml").write_text("expe: a\n")
+    (group_dir / "run_a" / "settings.yaml").write_text("run: 1\n")
+    (group_dir / "run_b" / "settings.yaml").write_text("expe: b\n")
+
+    monkeypatch.setattr(cli_args, "experiment_filters", {"expe": "b"})
+    store_simple.reset_settings_cache()
+
+    # the results directory overriding the filtered setting is found by default ...
+    assert list(store_simple.iter_results_directories(tmp_path)) == [group_dir / "run_a", group_dir / "run_b"]
+
+    # ... but not when the filters are pushed down to the directories walk
+    assert list(store_simple.iter_results_directories(tmp_path, filter_pushdown=True)) == []
+
+
+def test_settings_of_the_relative_root_directory(tmp_path, monkeypatch):
+    (tmp_path / "run").mkdir()
+    (tmp_path / "settings.common.yaml").write_text("common: 1\n")
+    (tmp_path / "run" / "settings.yaml").write_text("a: 2\n")
+
+    monkeypatch.chdir(tmp_path)
+    resolver = store_simple.SettingsResolver()
+
+    assert resolver.get_settings(pathlib.Path("run")) == {"common": 1, "a": 2}
+    assert resolver.get_settings(pathlib.Path(".") / "run") == {"common": 1, "a": 2}
+    assert resolver.get_inherited_settings(pathlib.Path(".")) == {"common": 1}
@@ -0,0 +1,80 @@
+import types
+import pathlib
+
+import matrix_benchmarking.common as common
+import matrix_benchmarking.cli_args as cli_args
+import matrix_benchmarking.store as store
+import matrix_benchmarking.plotting.table_stats as table_stats
+import matrix_benchmarking.store.snapshot as store_snapshot
+
+
+def build_snapshot(results_dir, execution_mode="visualize", **kwargs):
+    workload_store = types.ModuleType("fake.store")
+    workload_store.__file__ = __file__
+
+    return store_snapshot.MatrixSnapshot(workload_store, results_dir, None, execution_mode, kwargs)
+
+
+def test_snapshot_depends_on_the_execution_mode_and_flags(tmp_path):
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+
+    saved_state = [dict(common.Matrix.__dict__), dict(common.LTS_Matrix.__dict__)]
+    try:
+        build_snapshot(results_dir, lazy_missing_settings=True).save()
+
+        assert build_snapshot(results_dir, lazy_missing_settings=True).load()
+        assert not build_snapshot(results_dir, lazy_missing_settings=False).load()
+        assert not build_snapshot(results_dir, lazy_missing_settings=True, results_memory_budget=10).load()
+
+        analyze_snapshot = build_snapshot(results_dir, "analyze-lts", lazy_missing_settings=True)
+        assert analyze_snapshot.path != build_snapshot(results_dir).path
+        assert not analyze_snapshot.load()
+    finally:
+        for matrix, state in zip((common.Matrix, common.LTS_Matrix), saved_state):
+            matrix.__dict__.clear()
+            matrix.__dict__.update(state)
+
+
+def test_snapshot_keeps_the_stats_values(tmp_path):
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+
+    saved_state = [dict(common.Matrix.__dict__), dict(common.LTS_Matrix.__dict__)]
+    saved_kwargs = cli_args.kwargs
+    saved_engine = table_stats.stats_engine, common.MatrixEntry.stats_provider
+    try:
+        common.Matrix.__init__()
+        common.LTS_Matrix.__init__(is_lts=True)
+        cli_args.kwargs = dict(clean=False, run=False, execution_mode="visualize")
+        store.register_custom_rewrite_settings(lambda settings: settings)
+        for idx in range(4):
+            store.add_to_matrix({"a": idx}, pathlib.Path(f"/results/{idx}"), types.SimpleNamespace(v=idx * 2), 0,
+                                lambda *args: None)
+        common.Matrix.uniformize_settings_keys()
+
+        calls = []
+        def field(entry):
+            calls.append(entry)
+            return entry.results.v
+
+        stat = table_stats.TableStats.Value("test_snapshot_v", "Snapshot v", field, "d", "", higher_better=True)
+
+        table_stats.register_all()
+        build_snapshot(results_dir).save(table_stats.stats_engine.compute_all())
+        assert len(calls) == 4
+
+        common.Matrix.__init__()
+        snapshot = build_snapshot(results_dir)
+        assert snapshot.load()
+        table_stats.register_all()
+        table_stats.stats_engine.set_values(snapshot.stats_values)
+
+        assert [str(entry.stats[stat.name]) for entry in common.Matrix.records] == ["0 +/- 0", "2 +/- 0", "4 +/- 0", "6 +/- 0"]
+        assert len(calls) == 4 # not computed again
+    finally:
+        cli_args.kwargs = saved_kwargs
+        table_stats.stats_engine, common.MatrixEntry.stats_provider = saved_engine
+        for matrix, state in zip((common.Matrix, common.LTS_Matrix), saved_state):
+            matrix.__dict__.clear()
+            matrix.__dict__.update(state)
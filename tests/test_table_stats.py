@@ -0,0 +1,97 @@
+import types
+import pathlib
+
+import pytest
+
+import matrix_benchmarking.common as common
+import matrix_benchmarking.cli_args as cli_args
+import matrix_benchmarking.store as store
+from matrix_benchmarking.plotting.table_stats import TableStats, StatValue, StatsEngine, decimate_min_max, is_continuous_axis
+
+
+def build_entry(idx, results):
+    return types.SimpleNamespace(location=f"/results/{idx}", results=results, is_gathered=False)
+
+
+def test_batch_value_dev_keeps_the_values_type():
+    stat = TableStats.ValueDev("test_int_count", "Int count",
+                               lambda entry: entry.results.count if entry.results else None,
+                               "d", "", higher_better=True,
+                               dev_field=lambda entry: entry.results.count_dev)
+
+    entries = [build_entry(0, types.SimpleNamespace(count=3, count_dev=1)),
+               build_entry(1, None), # the dev_field would fail here
+               build_entry(2, types.SimpleNamespace(count=5, count_dev=0))]
+
+    batch_values = stat.process_batch(entries)
+    assert batch_values == [stat.process_value_dev(entry) for entry in entries]
+    assert batch_values == [(3, 1), (None, None), (5, 0)]
+    assert isinstance(batch_values[0][0], int)
+
+    formatted = []
+    for entry, v in zip(entries, batch_values):
+        value = StatValue(stat, entry)
+        value.set(v)
+        formatted.append(str(value))
+
+    assert formatted == ["3 +/- 1", "N/A", "5 +/- 0"]
+
+
+def test_gathered_values_are_shared_with_the_gathered_entries():
+    cli_args.kwargs = dict(clean=False, run=False, execution_mode="visualize")
+    store.register_custom_rewrite_settings(lambda settings: settings)
+
+    matrix = common.MatrixDefinition()
+    for idx in range(6):
+        store.add_to_matrix({"a": idx % 2, "@timestamp": idx}, pathlib.Path(f"/results/{idx}"),
+                            types.SimpleNamespace(v=idx), 0, lambda *args: None, matrix=matrix)
+    matrix.uniformize_settings_keys()
+
+    stat = TableStats.Value("test_gathered_v", "Gathered v", lambda entry: entry.results.v, "d", "", higher_better=True)
+    engine = StatsEngine(matrix)
+
+    gathered_entry = next(entry for entry in matrix.records if entry.is_gathered)
+    gathered_values = engine.get(stat.name, gathered_entry)
+
+    assert len(gathered_values) == 3
+    for gathered_value, entry in zip(gathered_values, gathered_entry.results):
+        assert gathered_value is engine.get(stat.name, entry)
+
+
+def test_decimation_keeps_the_errors_aligned():
+    x = list(range(1000))
+    y = [(idx * 37) % 101 for idx in x]
+    y_err = [[value / 10] for value in y]
+
+    dx, dy, dy_err = decimate_min_max(x, y, 100, y_err)
+
+    assert len(dx) < len(x)
+    assert max(dy) == max(y) and min(dy) == min(y)
+    assert all(y[_x] == _y and [_y / 10] == _y_err for _x, _y, _y_err in zip(dx, dy, dy_err))
+
+
+def test_only_the_continuous_axes_are_decimated():
+    assert is_continuous_axis([1, 2.5, None, 4])
+    assert not is_continuous_axis(["a=1, b=2", "a=1, b=3"])
+    assert not is_continuous_axis([True, False])
+
+
+def test_batch_mean_std_is_the_same_as_the_per_entry_evaluation():
+    stat = TableStats.MeanStd("test_mean_std", "Mean std", lambda entry: entry.results, ".2f", "s", higher_better=True)
+
+    numeric_values = [[1, 2, 3, 4], [1.5, 2.5], [2], [], 7, [10, 20, 30.5], [0.1, 0.2, 0.7, 1e-9]]
+    entries = [build_entry(idx, values) for idx, values in enumerate(numeric_values)]
+
+    batch_values = stat.process_batch(entries)
+    per_entry_values = [stat.process_mean_std(entry) for entry in entries]
+    assert batch_values == per_entry_values
+    assert [tuple(map(type, v)) for v in batch_values] == [tuple(map(type, v)) for v in per_entry_values]
+
+    # the per-entry evaluation raises on the non-numeric values, and so does the batch evaluation
+    for values in ([1, None, 3], ["1", "2"]):
+        entries.append(build_entry(len(entries), values))
+
+        with pytest.raises(TypeError):
+            stat.process_mean_std(entries[-1])
+        with pytest.raises(TypeError):
+            stat.process_batch(entries)
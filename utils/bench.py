@@ -0,0 +1,581 @@
+#! /usr/bin/env python3
+
+"""
+Micro-benchmarks of the MatrixBenchmarking internals, on generated data.
+
+Usage: python3 utils/bench.py BENCHMARK [ARGS...]
+
+Benchmarks:
+  matrix_key    [NB_ENTRIES]               MatrixKey construction and lookups, vs string-hashed keys
+  all_records   [NB_ENTRIES] [NB_VALUES]   product walk of all_records, vs the cartesian product lookup
+  matrix_memory [NB_ENTRIES]               memory of the Matrix entries, with LTS-like settings
+  results_cache [NB_ENTRIES] [BUDGET_MB]   memory and walk time of the results, in memory or spilled
+  table_stats   [NB_ENTRIES] [SERIES_LEN]  TableStats evaluation and do_plot, per entry or in batch
+  lts_columnar  [NB_DOCUMENTS]             LTS loading from the JSON files and from the columnar dataset
+  image_export  [NB_FIGURES] [NB_POINTS]   PNG export, one renderer per figure vs persistent renderer
+  report_size   [NB_FIGURES] [NB_POINTS]   size and generation time of the standard and compact reports
+"""
+
+import sys, os
+import json
+import time
+import types
+import random
+import pathlib
+import tempfile
+import itertools
+import tracemalloc
+import logging
+
+sys.path.insert(0, str(pathlib.Path(__file__).absolute().parent.parent))
+
+import matrix_benchmarking.common as common
+import matrix_benchmarking.cli_args as cli_args
+import matrix_benchmarking.store as store
+
+NB_SETTINGS = 12
+
+
+def setup(**kwargs):
+    logging.basicConfig(format="%(levelname)s | %(message)s", level=logging.WARNING)
+
+    cli_args.kwargs = dict(clean=False, run=False, **kwargs)
+    store.register_custom_rewrite_settings(lambda settings: settings)
+
+
+def add_to_matrix(settings, location, results, matrix=None):
+    kwargs = dict(matrix=matrix) if matrix is not None else {}
+    store.add_to_matrix(settings, pathlib.Path(location), results, 0,
+                        lambda *args: None, **kwargs)
+
+
+def timeit(name, fct, nb_entries):
+    start = time.time()
+    result = fct()
+    duration = time.time() - start
+    print(f"  {name:28s} {duration:7.3f}s ({duration / nb_entries * 1e6:5.2f}us/entry)")
+
+    return result, duration
+
+# ---
+# matrix_key: MatrixKey construction and lookups
+# ---
+
+class StrMatrixKey(dict):
+    # the string-hashed key, as done before the interned keys
+    def __init__(self, settings):
+        self.settings = settings
+
+    def __str__(self):
+        return "|".join(f"{k}={self.settings[k]}" for k in sorted(self.settings) if k != "stats")
+
+    def __hash__(self):
+        return hash(str(self))
+
+
+def _matrix_key_lookups(key_class, all_settings):
+    nb_entries = len(all_settings)
+
+    keys, construct_time = timeit("construction", lambda: [key_class(settings) for settings in all_settings], nb_entries)
+
+    processed_map, insert_time = timeit("insertion", lambda: {key: idx for idx, key in enumerate(keys)}, nb_entries)
+
+    def lookup_existing_keys():
+        return sum(1 for key in keys if key in processed_map)
+    found, lookup_time = timeit("lookup (existing keys)", lookup_existing_keys, nb_entries)
+    assert found == nb_entries
+
+    def lookup_new_keys():
+        return sum(1 for settings in all_settings if key_class(settings) in processed_map)
+    found, get_record_time = timeit("lookup (new keys)", lookup_new_keys, nb_entries)
+    assert found == nb_entries
+
+    # settings coming from the UI are strings
+    str_settings = [{k: str(v) for k, v in settings.items()} for settings in all_settings]
+    def lookup_str_keys():
+        return sum(1 for settings in str_settings if key_class(settings) in processed_map)
+    found, _ = timeit("lookup (str settings)", lookup_str_keys, nb_entries)
+    assert found == nb_entries
+
+    return construct_time + insert_time + lookup_time + get_record_time
+
+
+def bench_matrix_key(nb_entries=100000):
+    rnd = random.Random(0)
+    all_settings = []
+    for idx in range(nb_entries):
+        settings = {f"setting_{i}": rnd.choice([1, 2, 4, 8, "value", True, 0.5]) for i in range(NB_SETTINGS)}
+        settings["run"] = idx
+        all_settings.append(settings)
+
+    print(f"{nb_entries} entries, {NB_SETTINGS + 1} settings per entry")
+
+    print("String-hashed keys:")
+    str_time = _matrix_key_lookups(StrMatrixKey, all_settings)
+
+    print("Interned keys:")
+    interned_time = _matrix_key_lookups(common.MatrixKey, all_settings)
+
+    print(f"Construction + insertion + lookups: {str_time:.2f}s -> {interned_time:.2f}s "
+          f"({str_time / interned_time:.1f}x)")
+
+# ---
+# all_records: product walk on sparse 8-dimensional matrices
+# ---
+
+NB_DIMENSIONS = 8
+
+
+def _product_records(matrix, settings, setting_lists):
+    # the cartesian product lookup, as done before the product walk
+    for settings_values in itertools.product(*setting_lists):
+        settings.update(dict(settings_values))
+
+        try:
+            e = matrix.processed_map[matrix.settings_to_key(settings)]
+        except KeyError: # missing experiment, ignore
+            continue
+
+        if not e.is_gathered:
+            yield e
+
+
+def bench_all_records(nb_entries=2000, nb_values=5):
+    setup(execution_mode="parse")
+
+    rnd = random.Random(0)
+    matrix = common.MatrixDefinition()
+    for idx in range(nb_entries):
+        settings = {f"dim_{dim}": f"value_{rnd.randrange(nb_values)}" for dim in range(NB_DIMENSIONS)}
+        settings["expe"] = "bench"
+        add_to_matrix(settings, f"/bench/{idx}", types.SimpleNamespace(), matrix=matrix)
+
+    matrix.uniformize_settings_keys()
+
+    print(f"{len(matrix.processed_map)} entries, {NB_DIMENSIONS} dimensions of {nb_values} values "
+          f"({nb_values ** NB_DIMENSIONS} combinations)")
+
+    for nb_variables in range(2, NB_DIMENSIONS + 1):
+        # plot the first 'nb_variables' dimensions, the others are fixed
+        variables = [f"dim_{dim}" for dim in range(nb_variables)]
+        settings = {key: sorted(values)[0] for key, values in matrix.settings.items()}
+        settings["stats"] = "bench"
+
+        setting_lists = [[(key, v) for v in sorted(matrix.settings[key])] for key in variables]
+
+        product_settings = dict(settings)
+        start = time.time()
+        product_entries = list(_product_records(matrix, product_settings, setting_lists))
+        product_time = time.time() - start
+
+        walk_settings = dict(settings)
+        start = time.time()
+        walk_entries = list(matrix.all_records(walk_settings, setting_lists))
+        walk_time = time.time() - start
+
+        assert [id(e) for e in walk_entries] == [id(e) for e in product_entries]
+        assert walk_settings == product_settings
+
+        print(f"{nb_variables} variables: {len(walk_entries):5d} entries, "
+              f"product lookup: {product_time:7.3f}s, product walk: {walk_time:7.3f}s "
+              f"({product_time / walk_time if walk_time else 0:.0f}x)")
+
+# ---
+# matrix_memory: memory of the Matrix entries
+# ---
+
+def _lts_settings(nb_entries):
+    rnd = random.Random(0)
+    for idx in range(nb_entries):
+        # new str/int objects for each entry, as when they are parsed from the files
+        settings = {f"setting_{i}": "".join(["value_", str(rnd.randrange(5))]) for i in range(NB_SETTINGS - 4)}
+        settings["version"] = "".join(["1.", str(rnd.randrange(20))])
+        settings["gpu_count"] = rnd.randrange(8) + 1000
+        settings["@timestamp"] = f"2024-01-01T00:00:00.{idx:06d}"
+        settings["test_uuid"] = f"uuid-{idx}"
+
+        yield settings
+
+
+def _lts_matrix(all_settings):
+    matrix = common.MatrixDefinition(is_lts=True)
+    for idx, settings in enumerate(all_settings):
+        add_to_matrix(dict(settings), f"/lts/{idx}.json", None, matrix=matrix)
+
+    matrix.uniformize_settings_keys()
+
+    return matrix
+
+
+def bench_matrix_memory(nb_entries=100000):
+    setup(execution_mode="parse")
+
+    all_settings = list(_lts_settings(nb_entries))
+
+    start = time.time()
+    matrix = _lts_matrix(all_settings)
+    duration = time.time() - start
+    del matrix
+
+    # tracemalloc slows down the allocations, measure the memory in a second run
+    tracemalloc.start()
+    matrix = _lts_matrix(all_settings)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{len(matrix.processed_map)} entries ({nb_entries} + their gathered entries), "
+          f"{NB_SETTINGS} settings per entry: {memory / 1024 / 1024:.1f} MB "
+          f"({memory / nb_entries:.0f} bytes per parsed entry), built in {duration:.1f}s")
+
+# ---
+# results_cache: results kept in memory or spilled to disk
+# ---
+
+SERIES_LENGTH = 2000
+
+
+def _results_matrix(nb_entries):
+    matrix = common.MatrixDefinition()
+    for idx in range(nb_entries):
+        # similar to a Prometheus metric, with (timestamp, value) points
+        results = types.SimpleNamespace(
+            metrics=dict(cpu=[(ts, float(ts % 97)) for ts in range(idx, idx + SERIES_LENGTH)]),
+            log=f"log of run {idx}\n" * 20,
+        )
+        add_to_matrix({"expe": "bench", "run": idx}, f"/bench/{idx}", results, matrix=matrix)
+
+    return matrix
+
+
+def _walk_results(matrix):
+    return sum(len(entry.results.metrics["cpu"]) for entry in matrix.processed_map.values())
+
+
+def _results_memory(nb_entries, budget):
+    import matrix_benchmarking.store.results_cache as results_cache
+
+    setup(execution_mode="visualize", results_memory_budget=budget)
+    results_cache.results_cache = None
+
+    matrix = _results_matrix(nb_entries)
+    start = time.time()
+    _walk_results(matrix)
+    _walk_results(matrix)
+    walk_time = time.time() - start
+    del matrix
+
+    # tracemalloc slows down the allocations, measure the memory in a second run
+    results_cache.results_cache = None
+    tracemalloc.start()
+    matrix = _results_matrix(nb_entries)
+    _walk_results(matrix)
+    memory, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    name = f"budget={budget}MB" if budget else "in memory"
+    print(f"  {name:15s} memory after the walk: {memory / 1024 / 1024:7.1f} MB, "
+          f"peak: {peak / 1024 / 1024:7.1f} MB, two walks: {walk_time:.2f}s")
+
+    if cache := results_cache.get_results_cache():
+        stats = cache.get_stats()
+        print(f"  {'':15s} {stats['loads']} loads, {stats['reloads']} reloads, {stats['evictions']} evictions")
+
+
+def bench_results_cache(nb_entries=500, budget=20):
+    print(f"{nb_entries} entries with {SERIES_LENGTH} points each")
+    _results_memory(nb_entries, 0)
+    _results_memory(nb_entries, budget)
+
+# ---
+# table_stats: TableStats evaluation, per entry or in batch
+#
+# The Plotly figure construction isn't part of the measurement.
+# ---
+
+class Figure():
+    # the Plotly figure construction takes most of the time with 10k points, and doesn't depend on the stats
+    def __init__(self, data):
+        self.data = data
+
+    def update_layout(self, *args, **kwargs):
+        pass
+
+
+def _per_entry_values(stat, entries):
+    import matrix_benchmarking.plotting.table_stats as table_stats
+
+    # as before the batch evaluation: one StatValue computed at a time
+    return [table_stats.stats_engine.get(stat.name, entry) for entry in entries]
+
+
+def _plot_stat(stat):
+    variables = {key: common.Matrix.settings[key] for key in ("a", "b")}
+    settings = {key: sorted(values)[0] for key, values in common.Matrix.settings.items()}
+    settings.update({key: "---" for key in variables})
+    settings["stats"] = stat.name
+    setting_lists = [[(key, value) for value in values] for key, values in variables.items()]
+
+    start = time.time()
+    stat.do_plot(list(variables), settings, setting_lists, variables, {})
+
+    return time.time() - start
+
+
+def _evaluate_stat(stat, get_stat_values):
+    entries = list(common.Matrix.all_records())
+
+    start = time.time()
+    for stat_value in get_stat_values(stat, entries):
+        stat_value.value
+
+    return time.time() - start
+
+
+def _table_stat_latency(stat, repeat=5):
+    import matrix_benchmarking.plotting.table_stats as table_stats
+
+    batch_get_stat_values = table_stats.get_stat_values
+
+    durations = {}
+    for name, get_stat_values in (("per entry", _per_entry_values),
+                                  ("batch", batch_get_stat_values)):
+        table_stats.get_stat_values = get_stat_values
+
+        evaluations = []; first_plots = []; memoized_plots = []
+        for _ in range(repeat):
+            table_stats.register_all() # fresh stats engine, nothing memoized
+            evaluations.append(_evaluate_stat(stat, get_stat_values))
+
+            table_stats.register_all()
+            first_plots.append(_plot_stat(stat))
+            memoized_plots.append(_plot_stat(stat))
+
+        durations[name] = min(evaluations), min(first_plots), min(memoized_plots)
+
+    table_stats.get_stat_values = batch_get_stat_values
+
+    print(f"  {stat.name} (best of {repeat}):")
+    for name, (evaluation, first_plot, memoized_plot) in durations.items():
+        print(f"    {name:10s} evaluation: {evaluation * 1000:7.1f}ms, "
+              f"do_plot: {first_plot * 1000:7.1f}ms (memoized: {memoized_plot * 1000:6.1f}ms)")
+
+
+def bench_table_stats(nb_entries=10000, series_length=50):
+    import matrix_benchmarking.plotting.table_stats as table_stats
+    from matrix_benchmarking.plotting.table_stats import TableStats
+
+    setup(execution_mode="visualize")
+
+    rnd = random.Random(0)
+    nb_values = int(nb_entries ** 0.5)
+    for idx in range(nb_entries):
+        settings = {"expe": "bench", "a": f"a{idx % nb_values}", "b": f"b{idx // nb_values}"}
+        results = types.SimpleNamespace(value=rnd.random() * 100, dev=rnd.random(),
+                                        series=[rnd.random() for _ in range(series_length)])
+        add_to_matrix(settings, f"/bench/{idx}", results)
+
+    common.Matrix.uniformize_settings_keys()
+    table_stats.go.Figure = Figure
+
+    stats = [
+        TableStats.ValueDev("value_dev", "ValueDev", lambda entry: entry.results.value, ".2f", "s", True,
+                            dev_field=lambda entry: entry.results.dev),
+        TableStats.MeanStd("mean_std", "MeanStd", lambda entry: entry.results.series, ".2f", "s", True),
+    ]
+
+    print(f"{nb_entries} entries, series of {series_length} values")
+    for stat in stats:
+        _table_stat_latency(stat)
+
+# ---
+# lts_columnar: LTS loading from the JSON files and from the columnar dataset
+# ---
+
+NB_KPIS = 20
+RESULTS_SIZE = 200
+
+
+def _lts_documents(lts_dir, nb_documents):
+    import matrix_benchmarking.download_lts as download_lts
+
+    rnd = random.Random(0)
+    with open(lts_dir / download_lts.LTS_ANCHOR_NAME, "w") as f:
+        print("index: bench", file=f)
+
+    for idx in range(nb_documents):
+        document = dict(
+            metadata=dict(
+                start=f"2024-01-01T00:00:00.{idx:06d}",
+                end=f"2024-01-01T01:00:00.{idx:06d}",
+                exit_code=0,
+                test_uuid=f"uuid-{idx}",
+                settings=dict(model=f"model-{idx % 13}", gpu_count=idx % 4, version=f"1.{idx % 7}"),
+            ),
+            kpis={f"kpi_{k}": dict(value=rnd.random(), unit="s", help="KPI help text", lower_better=True)
+                  for k in range(NB_KPIS)},
+            results=dict(values=[rnd.random() for _ in range(RESULTS_SIZE)]),
+        )
+        with open(lts_dir / f"bench_{idx}.json", "w") as f:
+            json.dump(document, f, indent=4)
+
+
+def _load_lts(lts_dir):
+    import matrix_benchmarking.store.simple as store_simple
+
+    common.LTS_Matrix.__init__(is_lts=True)
+
+    start = time.time()
+    store_simple.parse_lts_data(lts_dir)
+    duration = time.time() - start
+
+    assert common.LTS_Matrix.count_records() > 0
+
+    return duration
+
+
+def bench_lts_columnar(nb_documents=50000):
+    import matrix_benchmarking.store.simple as store_simple
+
+    setup(parse_workers=0)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lts_dir = pathlib.Path(tmp_dir)
+
+        print(f"Generating {nb_documents} LTS documents in {lts_dir} ...")
+        _lts_documents(lts_dir, nb_documents)
+
+        json_time = _load_lts(lts_dir)
+        print(f"JSON files:                   {json_time:6.2f}s")
+
+        start = time.time()
+        store_simple.build_lts_columnar_dataset(lts_dir)
+        print(f"Columnar dataset generation:  {time.time() - start:6.2f}s "
+              f"({os.path.getsize(lts_dir / store_simple.lts_columnar.COLUMNAR_FILENAME) / 1024 / 1024:.1f} MB)")
+
+        cli_args.kwargs["lts_columnar"] = True
+
+        columnar_time = _load_lts(lts_dir)
+        print(f"Columnar dataset:             {columnar_time:6.2f}s ({json_time / columnar_time:.1f}x)")
+
+# ---
+# image_export and report_size: figure files of the reports
+# ---
+
+WIDTH = 1200
+HEIGHT = 650
+
+
+def _figures(nb_figures, nb_points):
+    import plotly.graph_objects as go
+
+    rnd = random.Random(0)
+    figures = []
+    for idx in range(nb_figures):
+        fig = go.Figure()
+        for line in range(5):
+            fig.add_trace(go.Scatter(x=list(range(nb_points)), y=[rnd.random() * 100 for _ in range(nb_points)],
+                                     name=f"line {line}"))
+        fig.update_layout(title=f"Figure {idx}")
+        figures.append(fig)
+
+    return figures
+
+
+def _export_images(figures, dirname, cache_dir=None, first_idx=0):
+    import matrix_benchmarking.plotting.ui.image_export as image_export
+
+    exporter = image_export.ImageExporter(cache_dir)
+    exporter.export([(figure, dirname / f"fig_{idx}.png", WIDTH, HEIGHT)
+                     for idx, figure in enumerate(figures, first_idx)])
+
+    return exporter
+
+
+def bench_image_export(nb_figures=20, nb_points=500):
+    setup()
+
+    figures = _figures(nb_figures, nb_points)
+    dirname = pathlib.Path(tempfile.mkdtemp(prefix="matbench_bench_images_"))
+    cache_dir = dirname / "cache"
+
+    print(f"{nb_figures} figures of 5 x {nb_points} points, {WIDTH}x{HEIGHT} PNG")
+
+    start = time.time()
+    for idx, figure in enumerate(figures):
+        # like write_image with Kaleido >= 1: the renderer is started for each figure
+        _export_images([figure], dirname, first_idx=idx)
+    print(f"  one renderer per figure: {time.time() - start:6.2f}s")
+
+    start = time.time()
+    exporter = _export_images(figures, dirname, cache_dir)
+    durations = [duration for _, duration in exporter.batches[0]["figures"]]
+    print(f"  persistent renderer:     {time.time() - start:6.2f}s "
+          f"(first figure: {durations[0]:.2f}s, next ones: {sum(durations[1:]) / max(1, len(durations) - 1):.3f}s/figure)")
+
+    start = time.time()
+    _export_images(figures, dirname, cache_dir)
+    print(f"  unchanged figures:       {time.time() - start:6.2f}s")
+
+
+class NoImageExporter():
+    # the PNG export is the same with both report modes, it isn't part of the measurement
+    def export(self, images):
+        return [None] * len(images)
+
+
+def _generate_report(content, compact):
+    import matrix_benchmarking.plotting.ui.report as report
+
+    dirname = tempfile.mkdtemp(prefix="matbench_bench_report_")
+    cwd = os.getcwd()
+    os.chdir(dirname)
+    try:
+        cli_args.kwargs = dict(compact_reports=compact)
+
+        start = time.time()
+        report.generate(0, "sample", content, None)
+        duration = time.time() - start
+    finally:
+        os.chdir(cwd)
+
+    size = sum(path.stat().st_size for path in pathlib.Path(dirname).rglob("*") if path.is_file())
+
+    return size, duration
+
+
+def bench_report_size(nb_figures=20, nb_points=2000):
+    from dash import html, dcc
+    import matrix_benchmarking.plotting.ui.image_export as image_export
+
+    setup()
+    image_export.get_image_exporter = NoImageExporter
+
+    content = [html.H1("Sample report")]
+    for idx, fig in enumerate(_figures(nb_figures, nb_points)):
+        content += [html.H2(f"Figure {idx}"), dcc.Graph(figure=fig)]
+    content = html.Div(content)
+
+    print(f"{nb_figures} figures of 5 x {nb_points} points")
+    for name, compact in (("standard", False), ("compact", True)):
+        size, duration = _generate_report(content, compact)
+        print(f"  {name:10s} {size / 1024 / 1024:7.2f} MB, generated in {duration:.2f}s")
+
+
+BENCHMARKS = {
+    name.removeprefix("bench_"): fct
+    for name, fct in list(globals().items()) if name.startswith("bench_") and callable(fct)
+}
+
+
+def main(name=None, *args):
+    if name not in BENCHMARKS:
+        print(__doc__.strip(), file=sys.stderr)
+        return 1
+
+    BENCHMARKS[name](*map(int, args))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))